@@ -0,0 +1,97 @@
+"""Описание полей API и потоковая сериализация.
+
+Строки выбираются через values() — без создания моделей, а список
+кодируется по одному объекту, так что ответ уходит клиенту частями.
+Поле описывается путём в ORM и, при необходимости, функцией
+преобразования значения.
+"""
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+ENCODER = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def media_url(name):
+    return f'{settings.MEDIA_URL}{name}' if name else None
+
+
+POST_FIELDS = {
+    'id': ('id', None),
+    'text': ('text', None),
+    'pub_date': ('pub_date', None),
+    'author': ('author__username', None),
+    'group': ('group__slug', None),
+    'image': ('image', media_url),
+    'comment_count': ('comment_count', None),
+}
+
+GROUP_FIELDS = {
+    'id': ('id', None),
+    'title': ('title', None),
+    'slug': ('slug', None),
+    'description': ('description', None),
+}
+
+COMMENT_FIELDS = {
+    'id': ('id', None),
+    'post': ('post_id', None),
+    'author': ('author__username', None),
+    'text': ('text', None),
+    'created': ('created', None),
+}
+
+PROFILE_FIELDS = {
+    'username': ('username', None),
+    'first_name': ('first_name', None),
+    'last_name': ('last_name', None),
+    'post_count': ('stats__post_count', None),
+    'follower_count': ('stats__follower_count', None),
+    'following_count': ('stats__following_count', None),
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def select_fields(spec, requested=None):
+    """Поля из ?fields=a,b в порядке описания; без параметра — все."""
+    if not requested:
+        return list(spec)
+    names = {name.strip() for name in requested.split(',') if name.strip()}
+    unknown = names - spec.keys()
+    if unknown:
+        raise InvalidFields(', '.join(sorted(unknown)))
+    return [name for name in spec if name in names]
+
+
+def value_paths(spec, names, extra=()):
+    paths = [spec[name][0] for name in names]
+    return paths + [path for path in extra if path not in paths]
+
+
+def serialize_row(row, spec, names):
+    item = {}
+    for name in names:
+        path, convert = spec[name]
+        value = row[path]
+        item[name] = convert(value) if convert else value
+    return item
+
+
+def encode(value):
+    return ENCODER.encode(value)
+
+
+def stream_list(rows, spec, names, links):
+    """Куски JSON вида {"results": [...], "next": ..., "previous": ...}."""
+    yield '{"results":['
+    separator = ''
+    for row in rows:
+        yield separator + encode(serialize_row(row, spec, names))
+        separator = ','
+    yield '],'
+    yield ','.join(
+        f'{encode(key)}:{encode(value)}' for key, value in links.items()
+    )
+    yield '}'
@@ -0,0 +1,120 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.counters import recount_users
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import POST_PER_PAGE
+
+User = get_user_model()
+
+
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Тест')
+        cls.posts = Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(POST_PER_PAGE + 3)
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Последний пост')
+        recount_users()
+
+    def get_json(self, url, status=200, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status)
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        return json.loads(content.decode())
+
+    def test_post_list_pages_by_cursor(self):
+        url = reverse('api:post_list')
+        data = self.get_json(url)
+        self.assertEqual(len(data['results']), POST_PER_PAGE)
+        self.assertEqual(data['results'][0]['id'], self.post.pk)
+        self.assertEqual(data['results'][0]['author'], 'author')
+        self.assertEqual(data['results'][0]['group'], 'test-slug')
+        self.assertIsNone(data['previous'])
+        rest = self.client.get(data['next'])
+        rest = json.loads(b''.join(rest.streaming_content).decode())
+        self.assertEqual(len(rest['results']), 4)
+        self.assertIsNone(rest['next'])
+        seen = {item['id'] for item in data['results'] + rest['results']}
+        self.assertEqual(len(seen), POST_PER_PAGE + 4)
+
+    def test_sparse_fields_and_limit(self):
+        data = self.get_json(
+            reverse('api:post_list'), fields='id,text', limit=2)
+        self.assertEqual(
+            data['results'][0], {'id': self.post.pk, 'text': 'Последний пост'})
+        self.assertEqual(len(data['results']), 2)
+        self.assertIn('fields=id%2Ctext', data['next'])
+        self.assertIn('limit=2', data['next'])
+
+    def test_bad_parameters(self):
+        url = reverse('api:post_list')
+        for params in (
+            {'fields': 'id,password'},
+            {'limit': '0'},
+            {'limit': 'many'},
+            {'cursor': 'broken'},
+        ):
+            with self.subTest(params=params):
+                self.get_json(url, status=400, **params)
+
+    def test_detail_views(self):
+        data = self.get_json(
+            reverse('api:post_detail', args=[self.post.pk]))
+        self.assertEqual(data['text'], 'Последний пост')
+        self.assertIsNone(data['image'])
+        data = self.get_json(
+            reverse('api:profile_detail', args=['author']),
+            fields='username,post_count')
+        self.assertEqual(
+            data, {'username': 'author', 'post_count': POST_PER_PAGE + 4})
+        self.get_json(reverse('api:post_detail', args=[0]), status=404)
+        self.get_json(
+            reverse('api:profile_detail', args=['nobody']), status=404)
+
+    def test_nested_lists(self):
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        data = self.get_json(
+            reverse('api:comment_list', args=[self.post.pk]))
+        self.assertEqual(data['results'][0]['author'], 'reader')
+        data = self.get_json(reverse('api:group_list'))
+        self.assertEqual(data['results'][0]['slug'], 'test-slug')
+        data = self.get_json(
+            reverse('api:group_posts', args=['test-slug']), limit=100)
+        self.assertEqual(len(data['results']), POST_PER_PAGE + 4)
+        data = self.get_json(
+            reverse('api:profile_posts', args=['reader']))
+        self.assertEqual(data['results'], [])
+        self.get_json(
+            reverse('api:group_posts', args=['missing']), status=404)
+
+    def test_follow_feed(self):
+        url = reverse('api:follow_feed')
+        self.get_json(url, status=401)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        data = self.get_json(url, fields='id')
+        self.assertEqual(data['results'][0], {'id': self.post.pk})
+
+    def test_read_only(self):
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_list_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:post_list'))
+            b''.join(response.streaming_content)
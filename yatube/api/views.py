@@ -0,0 +1,141 @@
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from posts.models import Comment, Group, Post
+from posts.timeline import timeline_posts
+from posts.utils import (
+    FEED_ORDERING, POST_PER_PAGE, CursorPaginator, InvalidCursor
+)
+
+from .serializers import (
+    COMMENT_FIELDS, GROUP_FIELDS, POST_FIELDS, PROFILE_FIELDS,
+    InvalidFields, select_fields, serialize_row, stream_list, value_paths
+)
+
+MAX_LIMIT = 100
+GROUP_ORDERING = ('id',)
+COMMENT_ORDERING = ('created', 'id')
+
+
+def error(status, detail):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def page_limit(request):
+    limit = request.GET.get('limit')
+    if limit is None:
+        return POST_PER_PAGE
+    if not limit.isdigit() or not 0 < int(limit) <= MAX_LIMIT:
+        raise ValueError(limit)
+    return int(limit)
+
+
+def page_link(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f'{request.path}?{urlencode(sorted(params.items()))}'
+
+
+def list_response(request, queryset, spec, ordering=FEED_ORDERING):
+    """Страница queryset по курсору, потоком JSON."""
+    try:
+        names = select_fields(spec, request.GET.get('fields'))
+    except InvalidFields as unknown:
+        return error(400, f'Неизвестные поля: {unknown}')
+    try:
+        limit = page_limit(request)
+    except ValueError:
+        return error(400, f'limit должен быть от 1 до {MAX_LIMIT}')
+    fields = [name.lstrip('-') for name in ordering]
+    rows = queryset.order_by(*ordering).values(
+        *value_paths(spec, names, fields))
+    try:
+        page = CursorPaginator(rows, limit, ordering).page(
+            request.GET.get('cursor'))
+    except InvalidCursor:
+        return error(400, 'Неверный курсор')
+    links = {
+        'next': page_link(request, page.next_cursor),
+        'previous': page_link(request, page.previous_cursor),
+    }
+    return StreamingHttpResponse(
+        stream_list(page, spec, names, links),
+        content_type='application/json',
+    )
+
+
+def detail_response(request, queryset, spec):
+    try:
+        names = select_fields(spec, request.GET.get('fields'))
+    except InvalidFields as unknown:
+        return error(400, f'Неизвестные поля: {unknown}')
+    row = queryset.values(*value_paths(spec, names)).first()
+    if row is None:
+        return error(404, 'Не найдено')
+    return JsonResponse(
+        serialize_row(row, spec, names),
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+@require_safe
+def post_list(request):
+    return list_response(request, Post.objects.feed(), POST_FIELDS)
+
+
+@require_safe
+def post_detail(request, post_id):
+    return detail_response(
+        request, Post.objects.filter(pk=post_id), POST_FIELDS)
+
+
+@require_safe
+def comment_list(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error(404, 'Не найдено')
+    return list_response(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS,
+        COMMENT_ORDERING,
+    )
+
+
+@require_safe
+def group_list(request):
+    return list_response(
+        request, Group.objects.all(), GROUP_FIELDS, GROUP_ORDERING)
+
+
+@require_safe
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return error(404, 'Не найдено')
+    return list_response(request, group.posts.feed(), POST_FIELDS)
+
+
+@require_safe
+def profile_detail(request, username):
+    return detail_response(
+        request, User.objects.filter(username=username), PROFILE_FIELDS)
+
+
+@require_safe
+def profile_posts(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return error(404, 'Не найдено')
+    return list_response(request, author.posts.feed(), POST_FIELDS)
+
+
+@require_safe
+def follow_feed(request):
+    if not request.user.is_authenticated:
+        return error(401, 'Нужна авторизация')
+    return list_response(request, timeline_posts(request.user), POST_FIELDS)
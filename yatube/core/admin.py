@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'queue', 'status', 'attempts', 'run_at')
+    list_filter = ('queue', 'status')
+    search_fields = ('name', 'key')
+    readonly_fields = ('created', 'updated')
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,13 @@
+"""SQLite, в котором транзакции сразу берут блокировку записи.
+
+Обычный BEGIN откладывает блокировку до первой записи. Если за это время
+писал кто-то другой, транзакция, уже прочитавшая данные, не может
+продолжить и получает «database is locked» сразу, не дожидаясь
+busy_timeout. BEGIN IMMEDIATE ставит писателей в очередь с самого начала.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,126 @@
+"""Двухуровневый кэш: L1 в памяти процесса перед общим L2.
+
+L1 — LocMemCache с коротким TTL: повторные чтения в пределах одного
+воркера не ходят по сети. L2 — общий для всех процессов бэкенд
+(memcached, redis, база), он задаётся алиасом в OPTIONS['SHARED'].
+Операции, которым нужна согласованность между процессами (add, incr,
+delete), выполняются в L2, а локальная копия при этом сбрасывается.
+"""
+import threading
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .metrics import record_cache_event
+
+_MISSING = object()
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def record(alias, event, count=1):
+    with _stats_lock:
+        _stats[(alias, event)] += count
+    record_cache_event(alias, event, count)
+
+
+def cache_stats():
+    """Снимок счётчиков: {(алиас, 'l1_hit' | 'l2_hit' | 'miss'): n}."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.alias = location or 'tiered'
+        self.shared_alias = options.get('SHARED', 'default')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 2)
+        self.local = LocMemCache(f'tiered-{self.alias}', {
+            'TIMEOUT': self.local_timeout,
+            'OPTIONS': {
+                'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000),
+            },
+        })
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        value = self.local.get(key, _MISSING, version)
+        if value is not _MISSING:
+            record(self.alias, 'l1_hit')
+            return value
+        value = self.shared.get(key, _MISSING, version)
+        if value is _MISSING:
+            record(self.alias, 'miss')
+            return default
+        record(self.alias, 'l2_hit')
+        self.local.set(key, value, self.local_timeout, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = self.local.get_many(keys, version)
+        record(self.alias, 'l1_hit', len(found))
+        rest = [key for key in keys if key not in found]
+        if rest:
+            shared = self.shared.get_many(rest, version)
+            record(self.alias, 'l2_hit', len(shared))
+            record(self.alias, 'miss', len(rest) - len(shared))
+            self.local.set_many(shared, self.local_timeout, version)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self.local.set(key, value, self._local_timeout(timeout), version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        self.local.set_many(data, self._local_timeout(timeout), version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        self.local.delete(key, version)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version)
+        return self.shared.incr(key, delta, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def has_key(self, key, version=None):
+        return (
+            self.local.has_key(key, version)
+            or self.shared.has_key(key, version)
+        )
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version)
+        self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        self.local.delete_many(keys, version)
+        self.shared.delete_many(keys, version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
@@ -0,0 +1,206 @@
+"""Очередь отложенных задач в таблице core.Job, без внешнего брокера.
+
+Задача — функция с декоратором ``@job``; аргументы хранятся в JSON.
+``enqueue`` пишет строку в той же транзакции, что и сама запись: задача
+не потеряется и не выполнится для откатанных данных. Ключ
+идемпотентности склеивает задачи, которые ещё ждут в очереди.
+
+Воркеры (``manage.py run_workers``) забирают задачи пачками: там, где
+база умеет SELECT ... FOR UPDATE SKIP LOCKED, — через него; на SQLite
+транзакция и так начинается с BEGIN IMMEDIATE (core.backends.sqlite3),
+и забирающие идут по одному. Упавшая задача повторяется с
+экспоненциальной задержкой, после max_attempts получает статус failed.
+Задачи должны быть идемпотентными: воркер может упасть после работы, но
+до отметки о ней.
+"""
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.db import (
+    DEFAULT_DB_ALIAS, IntegrityError, connection, transaction
+)
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Имя задачи -> (функция, очередь, предел попыток).
+REGISTRY = {}
+BACKOFF_BASE = 10
+BACKOFF_MAX = 60 * 60
+
+
+class UnknownJob(LookupError):
+    pass
+
+
+def job(queue='default', max_attempts=5):
+    """Регистрирует функцию как задачу; имя — модуль и имя функции."""
+    def register(func):
+        func.job_name = f'{func.__module__}.{func.__qualname__}'
+        REGISTRY[func.job_name] = (func, queue, max_attempts)
+        return func
+    return register
+
+
+def _fields(task, kwargs, key, delay):
+    name = getattr(task, 'job_name', task)
+    if name not in REGISTRY:
+        raise UnknownJob(name)
+    _, queue, max_attempts = REGISTRY[name]
+    run_at = timezone.now()
+    if delay:
+        run_at += timedelta(seconds=delay)
+    return {
+        'queue': queue,
+        'name': name,
+        'payload': json.dumps(kwargs or {}, sort_keys=True),
+        'key': key,
+        'max_attempts': max_attempts,
+        'run_at': run_at,
+    }
+
+
+def enqueue(task, kwargs=None, key=None, delay=None):
+    """Ставит задачу; с ключом возвращает уже ждущую, если она есть.
+
+    Ждущую задачу ищем в основной базе: на GET чтение ушло бы на реплику,
+    которая может ещё не знать о ней. Если её успели забрать между
+    INSERT и чтением, возвращает None.
+    """
+    fields = _fields(task, kwargs, key, delay)
+    if key is None:
+        return Job.objects.create(**fields)
+    pending = Job.objects.using(DEFAULT_DB_ALIAS).filter(
+        key=key, status=Job.PENDING)
+    waiting = pending.first()
+    if waiting is not None:
+        return waiting
+    try:
+        with transaction.atomic():
+            return Job.objects.create(**fields)
+    except IntegrityError:
+        return pending.first()
+
+
+def enqueue_many(task, items):
+    """Пачка задач одним INSERT; items — пары (kwargs, key).
+
+    Задачи с ключом, уже ждущим в очереди, пропускаются.
+    """
+    Job.objects.bulk_create(
+        (Job(**_fields(task, kwargs, key, None)) for kwargs, key in items),
+        ignore_conflicts=True,
+    )
+
+
+def backoff(attempt):
+    """Задержка перед повтором: 10 с, 20 с, 40 с... с разбросом."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1)
+
+
+def claim(queues, limit):
+    """Переводит до limit готовых задач в running.
+
+    Возвращает пары (id, очередь).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ready = Job.objects.filter(
+            queue__in=queues, status=Job.PENDING, run_at__lte=now
+        ).order_by('run_at', 'pk')
+        exclusive = connection.vendor == 'sqlite'
+        if connection.features.has_select_for_update_skip_locked:
+            ready = ready.select_for_update(skip_locked=True)
+            exclusive = True
+        claimed = list(ready.values_list('pk', 'queue')[:limit])
+        running = {
+            'status': Job.RUNNING,
+            'attempts': F('attempts') + 1,
+            'updated': now,
+        }
+        if exclusive:
+            Job.objects.filter(
+                pk__in=[pk for pk, _ in claimed]).update(**running)
+            return claimed
+        # Без блокировок строк соседний воркер мог успеть первым.
+        return [
+            (pk, queue) for pk, queue in claimed
+            if Job.objects.filter(pk=pk, status=Job.PENDING).update(
+                **running)
+        ]
+
+
+def superseded(key):
+    """Ждущая задача с тем же ключом: повторять упавшую незачем."""
+    if key is None:
+        return Job.objects.none()
+    return Job.objects.filter(key=key, status=Job.PENDING)
+
+
+def run(job_id):
+    """Выполняет задачу; True — успех, False — ошибка (будет повтор)."""
+    job = Job.objects.get(pk=job_id)
+    try:
+        if job.name not in REGISTRY:
+            raise UnknownJob(job.name)
+        func = REGISTRY[job.name][0]
+        func(**json.loads(job.payload))
+    except Exception:
+        logger.exception('Задача %s (%s) упала', job.pk, job.name)
+        retry = (
+            job.attempts < job.max_attempts
+            and not superseded(job.key).exists()
+        )
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.PENDING if retry else Job.FAILED,
+            run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+            last_error=traceback.format_exc()[-2000:],
+            updated=timezone.now(),
+        )
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE, last_error='', updated=timezone.now())
+    return True
+
+
+def requeue_stale(older_than):
+    """Возвращает в очередь задачи упавших воркеров."""
+    requeued = 0
+    stale = Job.objects.filter(status=Job.RUNNING, updated__lt=older_than)
+    for pk in stale.values_list('pk', flat=True):
+        try:
+            with transaction.atomic():
+                requeued += stale.filter(pk=pk).update(status=Job.PENDING)
+        except IntegrityError:
+            # Такую же задачу уже поставили заново.
+            stale.filter(pk=pk).update(status=Job.FAILED)
+    return requeued
+
+
+def purge(older_than):
+    return Job.objects.filter(
+        status=Job.DONE, updated__lt=older_than).delete()[0]
+
+
+def queue_stats(window=60):
+    """Число задач по (очередь, статус) и выполненных за window секунд."""
+    counts = {
+        (row['queue'], row['status']): row['total']
+        for row in Job.objects.values('queue', 'status')
+        .annotate(total=Count('pk')).order_by()
+    }
+    done = {
+        row['queue']: row['total']
+        for row in Job.objects.filter(
+            status=Job.DONE,
+            updated__gte=timezone.now() - timedelta(seconds=window),
+        ).values('queue').annotate(total=Count('pk')).order_by()
+    }
+    return counts, done
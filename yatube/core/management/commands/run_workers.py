@@ -0,0 +1,141 @@
+import multiprocessing
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from core import jobs
+
+
+def run_in_thread(job_id):
+    try:
+        return jobs.run(job_id)
+    finally:
+        connection.close()
+
+
+class Worker:
+    """Цикл одного процесса: забрать пачку, выполнить в пуле потоков."""
+
+    def __init__(self, queues, threads, batch, poll, once):
+        self.queues = queues
+        self.threads = threads
+        self.batch = batch
+        self.poll = poll
+        self.once = once
+        self.started = time.perf_counter()
+        self.done = Counter()
+        self.failed = Counter()
+
+    def loop(self, write):
+        pool = (
+            ThreadPoolExecutor(max_workers=self.threads)
+            if self.threads else None
+        )
+        try:
+            while True:
+                claimed = jobs.claim(self.queues, self.batch)
+                if not claimed:
+                    if self.once:
+                        break
+                    time.sleep(self.poll)
+                    continue
+                ids = [pk for pk, _ in claimed]
+                if pool is None:
+                    results = [jobs.run(pk) for pk in ids]
+                else:
+                    results = list(pool.map(run_in_thread, ids))
+                for (_, queue), ok in zip(claimed, results):
+                    (self.done if ok else self.failed)[queue] += 1
+                for queue in sorted({queue for _, queue in claimed}):
+                    write(self.throughput(queue))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def throughput(self, queue):
+        elapsed = time.perf_counter() - self.started
+        return (
+            f'{queue}: готово {self.done[queue]}, '
+            f'с ошибкой {self.failed[queue]}, '
+            f'{self.done[queue] / elapsed:.1f} задач/с'
+        )
+
+
+def process_main(worker):
+    django.setup()
+
+    def write(line):
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+    worker.loop(write)
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи очереди core.Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queues',
+            help='Очереди через запятую; по умолчанию все известные.')
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов-воркеров.')
+        parser.add_argument(
+            '--threads', type=int, default=2,
+            help='Потоков в процессе; 0 — выполнять в основном потоке.')
+        parser.add_argument(
+            '--batch', type=int, default=10,
+            help='Сколько задач забирать из очереди за раз.')
+        parser.add_argument(
+            '--poll', type=float, default=2,
+            help='Пауза между опросами пустой очереди, секунд.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать готовые задачи и выйти.')
+        parser.add_argument(
+            '--stale-minutes', type=int, default=10,
+            help='Через сколько минут задача running считается брошенной.')
+        parser.add_argument(
+            '--keep-days', type=int, default=7,
+            help='Сколько дней хранить выполненные задачи.')
+
+    def handle(self, *args, **options):
+        known = {queue for _, queue, _ in jobs.REGISTRY.values()}
+        queues = (
+            options['queues'].split(',') if options['queues']
+            else sorted(known)
+        )
+        unknown = set(queues) - known
+        if unknown:
+            raise CommandError(f'Нет задач в очередях: {", ".join(unknown)}')
+        now = timezone.now()
+        jobs.requeue_stale(now - timedelta(minutes=options['stale_minutes']))
+        jobs.purge(now - timedelta(days=options['keep_days']))
+        worker = Worker(
+            queues,
+            options['threads'],
+            options['batch'],
+            options['poll'],
+            options['once'],
+        )
+        if options['processes'] <= 1:
+            worker.loop(self.stdout.write)
+            return
+        # Соединения родителя не должны достаться дочерним процессам.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=process_main, args=(worker,))
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
@@ -0,0 +1,177 @@
+"""Замеры запросов: время в базе, шаблонах и кэше, скользящие перцентили.
+
+RequestTimings собирает данные одного запроса (его ставит
+TimingMiddleware в текущий поток), а ROLLING хранит последние
+METRICS_WINDOW длительностей по имени URL — для /metrics. Окно своё у
+каждого процесса.
+"""
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+
+_local = threading.local()
+
+
+def current():
+    return getattr(_local, 'timings', None)
+
+
+class RequestTimings:
+    def __init__(self, keep_statements=False):
+        self.started = time.perf_counter()
+        # (sql, секунды) каждого запроса — для core.queries.
+        self.statements = [] if keep_statements else None
+        self.total = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+        self.cache = Counter()
+        self._render_depth = 0
+
+    def __enter__(self):
+        self._previous = current()
+        _local.timings = self
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.timings = self._previous
+        self.total = time.perf_counter() - self.started
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db += duration
+            self.queries += 1
+            if self.statements is not None:
+                self.statements.append((sql, duration))
+
+    def render(self, render):
+        """Время шаблонов без двойного счёта вложенных render_to_string."""
+        self._render_depth += 1
+        started = time.perf_counter()
+        try:
+            return render()
+        finally:
+            self._render_depth -= 1
+            if not self._render_depth:
+                self.template += time.perf_counter() - started
+
+
+def record_cache_event(alias, event, count=1):
+    timings = current()
+    if timings is not None:
+        timings.cache[f'{alias}_{event}'] += count
+
+
+class RollingStats:
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.totals = Counter()
+
+    def add(self, name, timings):
+        with self.lock:
+            window = self.windows.setdefault(name, deque(maxlen=self.size))
+            window.append(timings.total)
+            self.totals[(name, 'count')] += 1
+            self.totals[(name, 'seconds')] += timings.total
+            self.totals[(name, 'db_seconds')] += timings.db
+            self.totals[(name, 'template_seconds')] += timings.template
+            self.totals[(name, 'queries')] += timings.queries
+
+    def snapshot(self):
+        with self.lock:
+            windows = {
+                name: sorted(values) for name, values in self.windows.items()
+            }
+            return windows, dict(self.totals)
+
+    def clear(self):
+        with self.lock:
+            self.windows.clear()
+            self.totals.clear()
+
+
+ROLLING = RollingStats(settings.METRICS_WINDOW)
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def quantile(values, share):
+    return values[round(share * (len(values) - 1))]
+
+
+def label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
+
+
+def prometheus_text(cache_events, job_stats=({}, {})):
+    """Метрики в текстовом формате Prometheus.
+
+    job_stats — результат core.jobs.queue_stats(): воркеры живут в других
+    процессах, поэтому очередь считается по таблице.
+    """
+    windows, totals = ROLLING.snapshot()
+    lines = [
+        '# HELP yatube_request_duration_seconds Время ответа, '
+        'скользящее окно по имени URL.',
+        '# TYPE yatube_request_duration_seconds summary',
+    ]
+    for name, values in sorted(windows.items()):
+        view = label(name)
+        for share in QUANTILES:
+            lines.append(
+                f'yatube_request_duration_seconds'
+                f'{{view="{view}",quantile="{share}"}} '
+                f'{quantile(values, share):.6f}'
+            )
+        lines.append(
+            f'yatube_request_duration_seconds_sum{{view="{view}"}} '
+            f'{totals[(name, "seconds")]:.6f}'
+        )
+        lines.append(
+            f'yatube_request_duration_seconds_count{{view="{view}"}} '
+            f'{totals[(name, "count")]}'
+        )
+    for metric, key, description in (
+        ('yatube_request_db_seconds_total', 'db_seconds',
+         'Время в базе данных.'),
+        ('yatube_request_template_seconds_total', 'template_seconds',
+         'Время рендеринга шаблонов.'),
+        ('yatube_request_queries_total', 'queries', 'SQL-запросов.'),
+    ):
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} counter')
+        for name in sorted(windows):
+            lines.append(
+                f'{metric}{{view="{label(name)}"}} {totals[(name, key)]}')
+    lines.append('# HELP yatube_cache_events_total Обращения к кэшу.')
+    lines.append('# TYPE yatube_cache_events_total counter')
+    for (alias, event), count in sorted(cache_events.items()):
+        lines.append(
+            f'yatube_cache_events_total'
+            f'{{cache="{label(alias)}",event="{label(event)}"}} {count}'
+        )
+    counts, done = job_stats
+    lines.append('# HELP yatube_jobs Задач в очереди по статусам.')
+    lines.append('# TYPE yatube_jobs gauge')
+    for (queue, status), count in sorted(counts.items()):
+        lines.append(
+            f'yatube_jobs{{queue="{label(queue)}",status="{label(status)}"}} '
+            f'{count}'
+        )
+    lines.append(
+        '# HELP yatube_jobs_done_last_minute Выполнено задач за минуту.')
+    lines.append('# TYPE yatube_jobs_done_last_minute gauge')
+    for queue, count in sorted(done.items()):
+        lines.append(
+            f'yatube_jobs_done_last_minute{{queue="{label(queue)}"}} {count}')
+    return '\n'.join(lines) + '\n'
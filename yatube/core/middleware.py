@@ -0,0 +1,91 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import queries
+from .metrics import ROLLING, RequestTimings
+from .routers import primary_writes, replica_reads
+
+logger = logging.getLogger('yatube.requests')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReplicaMiddleware:
+    """Пускает чтение на реплики, кроме сессий, которые недавно писали.
+
+    После небезопасного запроса или любого, который что-то записал
+    (подписка идёт GET-ом), клиент получает cookie на время
+    REPLICA_PIN_SECONDS (больше отставания реплик) и до её истечения
+    читает из основной базы — свои посты, комментарии и подписки видны
+    сразу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writing = request.method not in SAFE_METHODS
+        pinned = writing or settings.REPLICA_PIN_COOKIE in request.COOKIES
+        with replica_reads(not pinned), primary_writes() as written:
+            response = self.get_response(request)
+        if writing or written:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class TimingMiddleware:
+    """Время запроса по частям: заголовок Server-Timing, строка лога
+    в JSON и скользящие перцентили для /metrics. С QUERY_INSPECTION ещё
+    и разбор SQL (core.queries)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inspect = settings.QUERY_INSPECTION
+        with RequestTimings(inspect) as timings, ExitStack() as stack:
+            for db in connections.all():
+                stack.enter_context(
+                    db.execute_wrapper(timings.query_wrapper))
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        ROLLING.add(view, timings)
+        if inspect:
+            queries.report(view, timings)
+        response['Server-Timing'] = server_timing(timings)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'total_ms': round(timings.total * 1000, 2),
+            'db_ms': round(timings.db * 1000, 2),
+            'queries': timings.queries,
+            'template_ms': round(timings.template * 1000, 2),
+            'cache': dict(timings.cache),
+        }))
+        return response
+
+
+def server_timing(timings):
+    cache = ' '.join(
+        f'{event}={count}' for event, count in sorted(timings.cache.items()))
+    parts = [
+        f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+        f'tpl;dur={timings.template * 1000:.1f}',
+        f'total;dur={timings.total * 1000:.1f}',
+    ]
+    if cache:
+        parts.insert(2, f'cache;desc="{cache}"')
+    return ', '.join(parts)
@@ -0,0 +1,65 @@
+"""Разбор SQL одного запроса: отпечатки, повторы, медленные и бюджеты.
+
+Отпечаток — текст запроса без значений: литералы и параметры заменены
+на «?», списки IN (?, ?, ...) свёрнуты. Одинаковый отпечаток несколько
+раз за запрос почти всегда означает N+1. Бюджеты — QUERY_BUDGETS по
+имени URL; при QUERY_BUDGET_STRICT превышение — исключение, и тесты,
+которые ходят по страницам, падают.
+"""
+import logging
+import re
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.queries')
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+# Служебные команды транзакций не относятся к логике страницы.
+SERVICE = re.compile(
+    r'^\s*(SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def duplicates(statements):
+    """{отпечаток: сколько раз}, только повторявшиеся."""
+    counts = Counter(
+        fingerprint(sql) for sql, _ in statements if not SERVICE.match(sql))
+    return {shape: count for shape, count in counts.items() if count > 1}
+
+
+def slow(statements, threshold_ms):
+    return [
+        (sql, duration * 1000) for sql, duration in statements
+        if duration * 1000 > threshold_ms
+    ]
+
+
+def report(view, timings):
+    """Пишет предупреждения и проверяет бюджет view."""
+    for shape, count in duplicates(timings.statements).items():
+        logger.warning('%s: повтор x%d: %s', view, count, shape)
+    for sql, duration in slow(timings.statements, settings.SLOW_QUERY_MS):
+        logger.warning('%s: медленный запрос %.1f мс: %s', view, duration, sql)
+    budget = settings.QUERY_BUDGETS.get(view)
+    if budget is None or timings.queries <= budget:
+        return
+    message = f'{view}: {timings.queries} запросов при бюджете {budget}'
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,66 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики используются, только пока их явно разрешил ReplicaMiddleware —
+для безопасных запросов без метки «только что писал». Команды, воркеры
+и транзакции читают из default, поэтому отставание реплики не мешает
+им увидеть собственные записи.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def replica_reads_allowed():
+    return getattr(_state, 'allowed', False)
+
+
+@contextmanager
+def primary_writes():
+    """Собирает модели, которые код внутри записал в основную базу."""
+    previous = getattr(_state, 'writes', None)
+    _state.writes = written = set()
+    try:
+        yield written
+    finally:
+        _state.writes = previous
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    previous = replica_reads_allowed()
+    _state.allowed = allowed
+    try:
+        yield
+    finally:
+        _state.allowed = previous
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not replica_reads_allowed()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        written = getattr(_state, 'writes', None)
+        # Кэш в базе (DatabaseCache) — не данные пользователя.
+        if written is not None and model._meta.app_label != 'django_cache':
+            written.add(model._meta.label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,66 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from core.cache import cache_stats, reset_cache_stats
+
+TIERED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+    },
+    'tiered': {
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'tiered',
+        'OPTIONS': {'SHARED': 'default', 'LOCAL_TIMEOUT': 60},
+    },
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTest(TestCase):
+    def setUp(self):
+        self.cache = caches['tiered']
+        self.shared = caches['default']
+        self.cache.clear()
+        reset_cache_stats()
+
+    def test_set_writes_both_tiers(self):
+        self.cache.set('key', 'value')
+        self.assertEqual(self.shared.get('key'), 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(cache_stats(), {('tiered', 'l1_hit'): 1})
+
+    def test_shared_value_is_copied_to_local_tier(self):
+        self.shared.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.shared.delete('key')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(cache_stats(), {
+            ('tiered', 'l2_hit'): 1,
+            ('tiered', 'l1_hit'): 1,
+        })
+
+    def test_get_many_counts_misses(self):
+        self.cache.set('a', 1)
+        self.shared.set('b', 2)
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+        self.assertEqual(cache_stats(), {
+            ('tiered', 'l1_hit'): 1,
+            ('tiered', 'l2_hit'): 1,
+            ('tiered', 'miss'): 1,
+        })
+
+    def test_add_and_incr_use_shared_tier(self):
+        self.cache.set('counter', 1)
+        self.shared.set('counter', 5)
+        self.assertEqual(self.cache.incr('counter'), 6)
+        self.assertEqual(self.cache.get('counter'), 6)
+        self.assertFalse(self.cache.add('counter', 0))
+        self.assertTrue(self.cache.add('lock', True))
+
+    def test_delete_removes_both_tiers(self):
+        self.cache.set('key', 'value')
+        self.cache.delete('key')
+        self.assertIsNone(self.shared.get('key'))
+        self.assertIsNone(self.cache.get('key'))
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.db.utils import load_backend
+from django.test import SimpleTestCase
+
+WRITERS = 8
+WRITES = 25
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Профиль только для SQLite')
+class SqliteProfileTest(SimpleTestCase):
+    """Отдельная файловая база: в памяти нет ни WAL, ни блокировок."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.params = {
+            **settings.DATABASES['default'],
+            'NAME': os.path.join(self.directory, 'stress.sqlite3'),
+        }
+        self.backend = load_backend(self.params['ENGINE'])
+        db = self.connect()
+        with db.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE counter (id integer PRIMARY KEY, value integer)')
+        db.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def connect(self):
+        db = self.backend.DatabaseWrapper(self.params, alias='stress')
+        db.ensure_connection()
+        return db
+
+    def pragma(self, db, name):
+        with db.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        db = self.connect()
+        self.assertEqual(self.pragma(db, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(db, 'synchronous'), 1)
+        self.assertEqual(
+            self.pragma(db, 'busy_timeout'),
+            settings.SQLITE_PRAGMAS['busy_timeout'],
+        )
+        db.close()
+
+    def write(self, errors):
+        db = self.connect()
+        for number in range(WRITES):
+            # Так же, как transaction.atomic(): чтение, затем запись.
+            db.set_autocommit(
+                False, force_begin_transaction_with_broken_autocommit=True)
+            try:
+                with db.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*) FROM counter')
+                    cursor.execute(
+                        'INSERT INTO counter (value) VALUES (%s)', [number])
+                db.commit()
+            except Exception as error:
+                errors.append(error)
+                db.rollback()
+            finally:
+                db.set_autocommit(True)
+        db.close()
+
+    def test_concurrent_writers_are_not_locked(self):
+        errors = []
+        threads = [
+            threading.Thread(target=self.write, args=(errors,))
+            for _ in range(WRITERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        db = self.connect()
+        with db.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM counter')
+            self.assertEqual(cursor.fetchone()[0], WRITERS * WRITES)
+        db.close()
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from core import jobs
+from core.metrics import prometheus_text
+from core.models import Job
+
+CALLS = []
+
+
+@jobs.job(queue='test')
+def remember(value):
+    CALLS.append(value)
+
+
+@jobs.job(queue='test', max_attempts=2)
+def explode():
+    raise ValueError('boom')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_key_merges_pending_jobs(self):
+        first = jobs.enqueue(remember, {'value': 1}, key='remember')
+        second = jobs.enqueue(remember, {'value': 2}, key='remember')
+        self.assertEqual(first.pk, second.pk)
+        jobs.claim(['test'], 10)
+        third = jobs.enqueue(remember, {'value': 3}, key='remember')
+        self.assertNotEqual(third.pk, first.pk)
+        jobs.enqueue_many(remember, [({'value': 4}, 'remember'),
+                                     ({'value': 5}, 'other')])
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 2)
+
+    def test_unknown_job(self):
+        with self.assertRaises(jobs.UnknownJob):
+            jobs.enqueue('missing.job')
+
+    def test_claim_respects_queue_and_delay(self):
+        ready = jobs.enqueue(remember, {'value': 1})
+        jobs.enqueue(remember, {'value': 2}, delay=60)
+        self.assertEqual(jobs.claim(['other'], 10), [])
+        self.assertEqual(jobs.claim(['test'], 10), [(ready.pk, 'test')])
+        ready.refresh_from_db()
+        self.assertEqual(ready.status, Job.RUNNING)
+        self.assertEqual(ready.attempts, 1)
+        self.assertEqual(jobs.claim(['test'], 10), [])
+
+    def test_run(self):
+        job = jobs.enqueue(remember, {'value': 'ok'})
+        jobs.claim(['test'], 10)
+        self.assertTrue(jobs.run(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(CALLS, ['ok'])
+
+    def test_retry_with_backoff(self):
+        job = jobs.enqueue(explode)
+        for status in (Job.PENDING, Job.FAILED):
+            with self.subTest(status=status):
+                Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+                jobs.claim(['test'], 10)
+                with self.assertLogs('core.jobs', 'ERROR'):
+                    self.assertFalse(jobs.run(job.pk))
+                job.refresh_from_db()
+                self.assertEqual(job.status, status)
+                self.assertIn('boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+
+    def test_superseded_job_not_retried(self):
+        job = jobs.enqueue(explode, key='explode')
+        jobs.claim(['test'], 10)
+        jobs.enqueue(explode, key='explode')
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.run(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_requeue_stale(self):
+        job = jobs.enqueue(remember, {'value': 1}, key='stale')
+        jobs.claim(['test'], 10)
+        older_than = timezone.now() - timedelta(minutes=10)
+        self.assertEqual(jobs.requeue_stale(older_than), 0)
+        Job.objects.filter(pk=job.pk).update(
+            updated=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(older_than), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+
+    def test_run_workers(self):
+        for value in range(3):
+            jobs.enqueue(remember, {'value': value})
+        out = StringIO()
+        call_command(
+            'run_workers', '--queues', 'test', '--threads', '0', '--once',
+            stdout=out)
+        self.assertEqual(sorted(CALLS), [0, 1, 2])
+        self.assertIn('test: готово 3, с ошибкой 0', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('run_workers', '--queues', 'missing', '--once')
+
+    def test_metrics(self):
+        for value in range(2):
+            jobs.enqueue(remember, {'value': value})
+        [(pk, _)] = jobs.claim(['test'], 1)
+        jobs.run(pk)
+        text = prometheus_text({}, jobs.queue_stats())
+        self.assertIn('yatube_jobs{queue="test",status="pending"} 1', text)
+        self.assertIn('yatube_jobs{queue="test",status="done"} 1', text)
+        self.assertIn('yatube_jobs_done_last_minute{queue="test"} 1', text)
@@ -0,0 +1,71 @@
+import json
+import re
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.metrics import ROLLING, RequestTimings
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TimingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        Post.objects.create(author=cls.user, text='Test-post')
+
+    def setUp(self):
+        cache.clear()
+        ROLLING.clear()
+
+    def test_server_timing_header(self):
+        with self.assertLogs('yatube.requests', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        for part in ('db;dur=', 'tpl;dur=', 'total;dur=', 'cache;desc="feed_'):
+            with self.subTest(part=part):
+                self.assertIn(part, header)
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['view'], 'posts:index')
+        self.assertEqual(entry['status'], 200)
+        self.assertIn(f'"{entry["queries"]} queries"', header)
+        self.assertGreater(entry['queries'], 0)
+        self.assertGreater(entry['template_ms'], 0)
+
+    def test_nested_renders_counted_once(self):
+        timings = RequestTimings()
+        timings.render(lambda: timings.render(lambda: time.sleep(0.02)))
+        self.assertGreaterEqual(timings.template, 0.02)
+        self.assertLess(timings.template, 0.04)
+
+    def test_metrics_endpoint(self):
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertRegex(
+            body,
+            r'yatube_request_duration_seconds\{view="posts:index",'
+            r'quantile="0.95"\} \d+\.\d+',
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 3',
+            body,
+        )
+        self.assertTrue(re.search(
+            r'yatube_cache_events_total\{cache="feed",event="\w+"\} \d+',
+            body,
+        ))
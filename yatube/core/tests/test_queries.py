@@ -0,0 +1,94 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.metrics import RequestTimings
+from core.queries import (
+    QueryBudgetExceeded, duplicates, fingerprint, report, slow
+)
+from posts.benchmark import scenarios, url_names
+from posts.seeding import seed
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class FingerprintTest(SimpleTestCase):
+    def test_values_are_replaced(self):
+        self.assertEqual(
+            fingerprint(
+                "SELECT * FROM t WHERE id = 15 AND name = 'it''s'"
+                '   AND x IN (1, 2, 3)'),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)',
+        )
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id = %s'),
+            fingerprint('SELECT * FROM t WHERE id = 7'),
+        )
+
+    def test_duplicates(self):
+        statements = [
+            ('SELECT * FROM auth_user WHERE id = 1', 0.001),
+            ('SELECT * FROM auth_user WHERE id = 2', 0.001),
+            ('SELECT * FROM posts_post', 0.001),
+            ('SAVEPOINT "s1"', 0.0),
+            ('SAVEPOINT "s2"', 0.0),
+        ]
+        self.assertEqual(
+            duplicates(statements),
+            {'SELECT * FROM auth_user WHERE id = ?': 2},
+        )
+
+    def test_slow(self):
+        statements = [('SELECT 1', 0.5), ('SELECT 2', 0.01)]
+        self.assertEqual(slow(statements, 100), [('SELECT 1', 500.0)])
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 1})
+    def test_budget(self):
+        timings = RequestTimings(keep_statements=True)
+        timings.queries = 2
+        with self.assertLogs('yatube.queries', 'WARNING'):
+            report('posts:index', timings)
+        with override_settings(QUERY_BUDGET_STRICT=True):
+            with self.assertRaises(QueryBudgetExceeded):
+                report('posts:index', timings)
+
+
+@override_settings(QUERY_INSPECTION=True, QUERY_BUDGET_STRICT=True)
+class QueryBudgetTest(TestCase):
+    """Каждая страница posts укладывается в бюджет и не повторяет запросы."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed(users=30, groups=3, posts=200, comments=300, follows=60)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_every_view_has_budget(self):
+        for name in url_names():
+            with self.subTest(name=name):
+                self.assertIn(f'posts:{name}', settings.QUERY_BUDGETS)
+
+    def test_views_within_budget(self):
+        logger = logging.getLogger('yatube.queries')
+        for name, scenario in scenarios().items():
+            with self.subTest(name=name):
+                handler = ListHandler()
+                logger.addHandler(handler)
+                try:
+                    response = scenario()
+                finally:
+                    logger.removeHandler(handler)
+                self.assertLess(response.status_code, 400)
+                self.assertEqual(handler.messages, [])
@@ -0,0 +1,165 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from core import jobs
+from core.middleware import ReplicaMiddleware
+from core.models import Job
+from core.routers import ReplicaRouter, replica_reads, replica_reads_allowed
+from posts.models import Follow, Post
+from posts.thumbnails import make_thumbnails
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_replica_only_when_allowed(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            with replica_reads(False):
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_writes_and_migrations_go_to_default(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+class ReplicaMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.allowed = []
+
+        def view(request):
+            self.allowed.append(replica_reads_allowed())
+            return HttpResponse()
+
+        self.middleware = ReplicaMiddleware(view)
+
+    def test_safe_request_that_writes_pins_client(self):
+        def view(request):
+            # Так ORM выбирает базу перед записью.
+            ReplicaRouter().db_for_write(Post)
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(self.factory.get('/'))
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_safe_request_reads_from_replica(self):
+        response = self.middleware(self.factory.get('/'))
+        self.assertEqual(self.allowed, [True])
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertFalse(replica_reads_allowed())
+
+    def test_write_pins_client_to_primary(self):
+        response = self.middleware(self.factory.post('/'))
+        self.assertEqual(self.allowed, [False])
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = cookie.value
+        self.middleware(request)
+        self.assertEqual(self.allowed, [False, False])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Реплика — копия файла SQLite')
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """Основная тестовая база и файл-реплика, обновляемый вручную."""
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.replica_path = os.path.join(cls.directory, 'replica.sqlite3')
+        connections.databases['replica'] = {
+            **connections.databases['default'],
+            'NAME': cls.replica_path,
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def replicate(self):
+        connections['replica'].close()
+        primary = connections['default']
+        primary.ensure_connection()
+        replica = sqlite3.connect(self.replica_path)
+        primary.connection.backup(replica)
+        replica.close()
+
+    def test_reads_follow_replica_until_client_writes(self):
+        author = User.objects.create_user(username='author')
+        old_post = Post.objects.create(author=author, text='Old')
+        self.replicate()
+        new_post = Post.objects.create(author=author, text='New')
+
+        def status(post):
+            return self.client.get(
+                reverse('posts:post_detail', args=[post.pk])).status_code
+
+        self.assertEqual(status(old_post), 200)
+        self.assertEqual(status(new_post), 404)
+        self.client.post(reverse('users:login'), {'username': 'author'})
+        self.assertEqual(status(new_post), 200)
+
+    def test_enqueue_sees_jobs_missing_on_replica(self):
+        self.replicate()
+        job = jobs.enqueue(make_thumbnails, {'post_id': 1}, key='thumbs')
+        with replica_reads():
+            again = jobs.enqueue(
+                make_thumbnails, {'post_id': 1}, key='thumbs')
+        self.assertEqual(again.pk, job.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_follow_pins_client_to_primary(self):
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        self.client.force_login(reader)
+        self.replicate()
+        response = self.client.get(
+            reverse('posts:profile_follow', args=['author']), follow=True)
+        self.assertIn(settings.REPLICA_PIN_COOKIE, self.client.cookies)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['author'].stats.follower_count, 1)
+        self.assertEqual(
+            Follow.objects.filter(author=author).count(), 1)
+
+    def test_feed_snapshots_built_from_primary(self):
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Old')
+        self.replicate()
+        Post.objects.create(author=author, text='New')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'New')
@@ -1,5 +1,11 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from .cache import cache_stats
+from .jobs import queue_stats
+from .metrics import prometheus_text
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию;
@@ -13,3 +19,11 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html')
+
+
+@staff_member_required
+def metrics(request):
+    return HttpResponse(
+        prometheus_text(cache_stats(), queue_stats()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
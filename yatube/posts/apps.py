@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Регистрирует задачи очереди core.jobs.
+        from . import group_stats, thumbnails, trending  # noqa: F401
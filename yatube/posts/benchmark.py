@@ -0,0 +1,163 @@
+"""Замеры страниц posts.urls через тестовый клиент.
+
+Для каждой страницы — задержка (p50/p95 и первый, «холодный» запрос),
+число SQL-запросов и пик памяти Python (tracemalloc, отдельным проходом,
+чтобы трассировка не искажала время).
+"""
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Follow, Group, Post
+from .urls import urlpatterns
+from .utils import comment_page
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[round(share * (len(values) - 1))]
+
+
+class Scenario:
+    def __init__(self, client, url, method='get', data=None, prepare=None):
+        self.client = client
+        self.url = url
+        self.method = method
+        self.data = data or {}
+        self.prepare = prepare or (lambda: None)
+
+    def __call__(self):
+        self.prepare()
+        return getattr(self.client, self.method)(self.url, self.data)
+
+
+def login(user):
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def scenarios():
+    """Сценарий на каждое имя из posts.urls; записи идут последними."""
+    author = User.objects.order_by('-stats__post_count').first()
+    reader = User.objects.order_by('-stats__following_count').first()
+    outsider = User.objects.exclude(pk=author.pk).exclude(
+        pk__in=Follow.objects.filter(author=author).values('user')
+    ).first()
+    group = Group.objects.annotate(size=Count('posts')).order_by(
+        '-size').first()
+    post = Post.objects.order_by('-comment_count').first()
+    own_post = author.posts.first()
+    word = post.text.split()[0].strip('.,')
+    guest = Client()
+
+    def unfollow():
+        Follow.objects.filter(user=outsider, author=author).delete()
+
+    def follow():
+        Follow.objects.get_or_create(user=outsider, author=author)
+
+    return {
+        'index': Scenario(guest, reverse('posts:index')),
+        'trending': Scenario(guest, reverse('posts:trending')),
+        'search': Scenario(guest, reverse('posts:search'), data={'q': word}),
+        'groups': Scenario(guest, reverse('posts:groups')),
+        'group_list': Scenario(
+            guest, reverse('posts:group_list', args=[group.slug])),
+        'profile': Scenario(
+            guest, reverse('posts:profile', args=[author.username])),
+        'post_detail': Scenario(
+            guest, reverse('posts:post_detail', args=[post.pk])),
+        'comments': Scenario(
+            guest, reverse('posts:comments', args=[post.pk]),
+            data={'cursor': comment_page(post).next_cursor or ''}),
+        'follow_index': Scenario(
+            login(reader), reverse('posts:follow_index')),
+        'post_edit': Scenario(
+            login(author), reverse('posts:post_edit', args=[own_post.pk])),
+        'post_create': Scenario(
+            login(author), reverse('posts:post_create'), 'post',
+            {'text': 'Замер'}),
+        'add_comment': Scenario(
+            login(reader), reverse('posts:add_comment', args=[post.pk]),
+            'post', {'text': 'Замер'}),
+        'profile_follow': Scenario(
+            login(outsider),
+            reverse('posts:profile_follow', args=[author.username]),
+            prepare=unfollow),
+        'profile_unfollow': Scenario(
+            login(outsider),
+            reverse('posts:profile_unfollow', args=[author.username]),
+            prepare=follow),
+    }
+
+
+def url_names():
+    return [pattern.name for pattern in urlpatterns]
+
+
+def measure(scenario, repeat):
+    for cache in caches.all():
+        cache.clear()
+    timings = []
+    queries = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = scenario()
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{scenario.url}: {response.status_code}')
+        queries.append(len(captured))
+    tracemalloc.start()
+    try:
+        scenario()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'first_ms': round(timings[0], 2),
+        'p50_ms': round(percentile(timings, 0.5), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'queries': max(queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run(repeat):
+    plans = scenarios()
+    missing = set(url_names()) - plans.keys()
+    if missing:
+        raise LookupError(
+            f'Нет сценария для: {", ".join(sorted(missing))}')
+    return {
+        f'posts:{name}': measure(plans[name], repeat)
+        for name in plans
+    }
+
+
+def compare(baseline, current, threshold):
+    """Регрессии: p95 выросла больше чем на threshold или стало больше
+    запросов."""
+    regressions = []
+    for size, pages in current.items():
+        for name, result in pages.items():
+            before = baseline.get(size, {}).get(name)
+            if before is None:
+                continue
+            if result['p95_ms'] > before['p95_ms'] * (1 + threshold):
+                regressions.append(
+                    f'{size} {name}: p95 {before["p95_ms"]} -> '
+                    f'{result["p95_ms"]} мс')
+            if result['queries'] > before['queries']:
+                regressions.append(
+                    f'{size} {name}: запросов {before["queries"]} -> '
+                    f'{result["queries"]}')
+    return regressions
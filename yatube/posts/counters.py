@@ -0,0 +1,58 @@
+"""Денормализованные счётчики: UserStats и Post.comment_count.
+
+Сигналы меняют счётчики F-выражениями в той же транзакции, что и сама
+запись; ниже нуля счётчик не опускается. Если счётчики разошлись с
+данными (массовый импорт, ручные правки в базе), их пересчитывает
+команда ``recount_stats``.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def change_user_stats(user_id, **deltas):
+    updated = UserStats.objects.filter(user_id=user_id).update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+    if not updated and min(deltas.values()) > 0:
+        # Строки ещё нет (пользователь создан до миграции): считаем с нуля.
+        UserStats.objects.get_or_create(user_id=user_id)
+        recount_users(User.objects.filter(pk=user_id))
+
+
+def change_comment_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=Greatest(F('comment_count') + delta, 0)
+    )
+
+
+def recount_users(users=None):
+    users = User.objects.all() if users is None else users
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in users.values_list('pk', flat=True)),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    return UserStats.objects.filter(user__in=users.values('pk')).update(
+        post_count=_count(Post.objects, 'author'),
+        follower_count=_count(Follow.objects, 'author'),
+        following_count=_count(Follow.objects, 'user'),
+    )
+
+
+def recount_posts(posts=None):
+    posts = Post.objects.all() if posts is None else posts
+    return posts.update(comment_count=_count(Comment.objects, 'post'))
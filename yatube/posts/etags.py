@@ -0,0 +1,48 @@
+"""ETag для условных GET страниц ленты.
+
+Значение собирается из поколений feed_cache, которые сигналы сдвигают
+при любом изменении ленты, и id зрителя — шапка и кнопки зависят от
+него. Last-Modified не отдаём: правка или удаление поста не меняют
+максимальную дату публикации, и клиент получил бы устаревшую страницу.
+"""
+from django.contrib.auth.models import User
+
+from .feed_cache import feed_etag
+from .models import Group, Post
+
+
+def index_etag(request):
+    return feed_etag(request, ['index'])
+
+
+def trending_etag(request):
+    return feed_etag(request, ['trending'])
+
+
+def groups_etag(request):
+    return feed_etag(request, ['groups'])
+
+
+def group_etag(request, slug):
+    group = Group.objects.filter(slug=slug).values_list(
+        'pk', 'title', 'description').first()
+    if group is None:
+        return None
+    # Пост может перейти из группы в группу — следим за всей лентой.
+    return feed_etag(request, ['index'], group)
+
+
+def profile_etag(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return None
+    return feed_etag(request, [f'profile:{author_id}'])
+
+
+def post_etag(request, post_id):
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True).first()
+    if author_id is None:
+        return None
+    return feed_etag(request, [f'post:{post_id}', f'profile:{author_id}'])
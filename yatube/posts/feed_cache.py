@@ -0,0 +1,149 @@
+"""Версионированный кэш страниц ленты.
+
+У каждой ленты (scope) есть счётчик поколений, который сигналы
+увеличивают при создании, правке и удалении постов, а также при правке
+их авторов и групп — снимок хранит посты вместе с ними. Страница в кэше
+помнит поколение, из которого она собрана: свежая отдаётся сразу, а
+устаревшая продолжает отдаваться, пока один воркер под блокировкой
+(cache.add) собирает новую — остальные не идут в базу одновременно.
+Если страницы в кэше нет совсем (истекла или вытеснена), остальные до
+LOCK_WAIT секунд ждут, пока её соберёт держатель блокировки.
+
+Те же поколения служат ETag для условных GET (см. feed_etag). Пока
+отдаётся устаревшая страница, её ETag строится из её поколения, а не из
+текущего (см. set_served_etag) — иначе клиент закэшировал бы старое тело
+под новым ETag и получал бы на него 304.
+
+Снимки собираются из основной базы, а не из реплики: первый посетитель
+после сброса иначе закэшировал бы под новым поколением страницу без
+только что записанного поста.
+
+Страницы лежат в двухуровневом кэше ``feed``, а поколения и блокировки —
+только в общем ``default``, чтобы все процессы видели их одинаково.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.http import quote_etag
+
+from core.routers import replica_reads
+
+PAGE_TIMEOUT = 60 * 60
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+LOCK_POLL = 0.05
+
+
+def generation_key(scope):
+    return f'feed:generation:{scope}'
+
+
+def get_generation(scope):
+    key = generation_key(scope)
+    generation = cache.get(key)
+    if generation is None:
+        # После очистки кэша поколение не должно совпасть со старым.
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_generations(scopes):
+    found = cache.get_many([generation_key(scope) for scope in scopes])
+    return [
+        found.get(generation_key(scope)) or get_generation(scope)
+        for scope in scopes
+    ]
+
+
+def bump_generation(scope):
+    try:
+        cache.incr(generation_key(scope))
+    except ValueError:
+        get_generation(scope)
+
+
+def invalidate(scope):
+    """Сбрасывает ленту сейчас и ещё раз после коммита транзакции.
+
+    Второй сброс нужен, если до коммита кто-то успел пересобрать
+    страницу из ещё не закоммиченных данных.
+    """
+    bump_generation(scope)
+    transaction.on_commit(lambda: bump_generation(scope))
+
+
+def invalidate_author_feeds(author_id):
+    invalidate('index')
+    invalidate('trending')
+    invalidate(f'profile:{author_id}')
+
+
+def generations_etag(request, generations, *extra):
+    user = request.user
+    state = (
+        list(generations),
+        user.pk if user.is_authenticated else None,
+        extra,
+    )
+    return hashlib.md5(repr(state).encode()).hexdigest()
+
+
+def feed_etag(request, scopes, *extra):
+    """ETag страницы: поколения её лент, зритель и прочие данные."""
+    return generations_etag(request, get_generations(scopes), *extra)
+
+
+def set_served_etag(response, request, generation):
+    """ETag снимка, который действительно отдан (см. cached_page).
+
+    @condition ставит ETag только если его нет в ответе.
+    """
+    response['ETag'] = quote_etag(generations_etag(request, [generation]))
+    return response
+
+
+def page_key(scope, variant):
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    return f'feed:page:{scope}:{digest}'
+
+
+def wait_for_page(pages, key):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = pages.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def cached_page(scope, variant, compute):
+    """Страница ленты из кэша с stale-while-revalidate.
+
+    Возвращает страницу и поколение, из которого она собрана.
+    """
+    key = page_key(scope, variant)
+    generation = get_generation(scope)
+    pages = caches['feed']
+    entry = pages.get(key)
+    if entry is not None and entry['generation'] == generation:
+        return entry['page'], generation
+    lock = f'{key}:lock'
+    locked = cache.add(lock, True, LOCK_TIMEOUT)
+    if not locked:
+        if entry is None:
+            entry = wait_for_page(pages, key)
+        if entry is not None:
+            return entry['page'], entry['generation']
+        # Держатель блокировки не успел: собираем сами.
+    try:
+        with replica_reads(False):
+            page = compute()
+        pages.set(key, {'generation': generation, 'page': page}, PAGE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock)
+    return page, generation
@@ -1,5 +1,6 @@
 from django import forms
 
+from . import images
 from .models import Post, Comment
 
 
@@ -13,6 +14,13 @@ class PostForm(forms.ModelForm):
             'image': 'Изображение',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # Новый файл — UploadedFile; сохранённая картинка уже проверена.
+        if image and hasattr(image, 'content_type'):
+            images.validate(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
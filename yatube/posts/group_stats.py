@@ -0,0 +1,69 @@
+"""Сводка по группам для каталога /groups/.
+
+Каталог читает готовую таблицу GroupStats, а не считает GROUP BY по
+постам на каждый запрос. Новый, удалённый или перенесённый в другую
+группу пост ставит в очередь (core.jobs) пересчёт своей группы с
+задержкой REFRESH_DELAY: всплеск постов в группе склеивается ключом в
+один пересчёт. ``manage.py refresh_group_stats`` пересчитывает всё
+целиком — на случай правок в обход ORM.
+"""
+import json
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from core.jobs import enqueue, job
+
+from .feed_cache import invalidate
+from .models import Group, GroupStats, Post
+
+TOP_AUTHORS = 3
+REFRESH_DELAY = 30
+
+
+def refresh(groups=None):
+    """Пересчитывает сводку групп (по умолчанию всех)."""
+    groups = Group.objects.all() if groups is None else groups
+    posts = Post.objects.filter(group__in=groups.values('pk')).order_by()
+    totals = {
+        row['group']: row
+        for row in posts.values('group').annotate(
+            count=Count('pk'), last=Max('pub_date'))
+    }
+    top = defaultdict(list)
+    for row in posts.values('group', 'author__username').annotate(
+        count=Count('pk')
+    ).order_by('group', '-count', 'author__username'):
+        if len(top[row['group']]) < TOP_AUTHORS:
+            top[row['group']].append([row['author__username'], row['count']])
+    group_ids = list(groups.values_list('pk', flat=True))
+    with transaction.atomic():
+        GroupStats.objects.filter(group__in=group_ids).delete()
+        GroupStats.objects.bulk_create(
+            GroupStats(
+                group_id=group_id,
+                post_count=totals.get(group_id, {}).get('count', 0),
+                last_post_at=totals.get(group_id, {}).get('last'),
+                top_authors=json.dumps(top[group_id], ensure_ascii=False),
+            )
+            for group_id in group_ids
+        )
+    invalidate('groups')
+    return len(group_ids)
+
+
+@job(queue='stats')
+def refresh_group(group_id):
+    refresh(Group.objects.filter(pk=group_id))
+
+
+def schedule_refresh(group_id):
+    if group_id is None:
+        return None
+    return enqueue(
+        refresh_group,
+        {'group_id': group_id},
+        key=f'group_stats:{group_id}',
+        delay=REFRESH_DELAY,
+    )
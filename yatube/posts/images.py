@@ -0,0 +1,104 @@
+"""Картинки постов: проверка при загрузке и нормализация в фоне.
+
+Форма проверяет только заголовок файла: размер, формат и число
+пикселей, не декодируя картинку целиком. Декодирование, поворот по EXIF,
+уменьшение до MAX_SIDE и пересжатие в JPEG без метаданных делает
+``normalize`` в задаче make_thumbnails (posts.thumbnails), перед тем как
+готовить миниатюры.
+"""
+import os
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from sorl.thumbnail import delete as delete_thumbnails
+
+from .models import Post
+
+MAX_BYTES = 10 * 1024 * 1024
+# Защита от «бомб»: 8000x5000 — с запасом для любой камеры телефона.
+MAX_PIXELS = 40 * 1000 * 1000
+MAX_SIDE = 2048
+FORMATS = ('JPEG', 'PNG', 'GIF', 'BMP', 'TIFF')
+JPEG_OPTIONS = {'quality': 85, 'optimize': True, 'progressive': True}
+
+
+def validate(file):
+    if file.size > MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)d МБ.',
+            code='file_too_large',
+            params={'limit': MAX_BYTES // (1024 * 1024)},
+        )
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            image_format = image.format
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Не удалось прочитать изображение.', code='invalid_image')
+    finally:
+        file.seek(0)
+    if image_format not in FORMATS:
+        raise ValidationError(
+            'Формат %(format)s не поддерживается.',
+            code='invalid_format',
+            params={'format': image_format},
+        )
+    if width * height > MAX_PIXELS:
+        raise ValidationError(
+            'Изображение больше %(limit)d мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': MAX_PIXELS // 1000000},
+        )
+
+
+def is_normalized(image):
+    return (
+        image.format == 'JPEG'
+        and max(image.size) <= MAX_SIDE
+        and not image.info.get('exif')
+    )
+
+
+def reencode(source):
+    """JPEG из открытого файла: поворот по EXIF, MAX_SIDE, без метаданных."""
+    with Image.open(source) as image:
+        if is_normalized(image):
+            return None
+        image.draft('RGB', (MAX_SIDE, MAX_SIDE))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((MAX_SIDE, MAX_SIDE), Image.LANCZOS)
+        output = BytesIO()
+        image.save(output, 'JPEG', **JPEG_OPTIONS)
+    return output.getvalue()
+
+
+def normalize(post):
+    """Заменяет картинку поста пересжатой копией; True, если заменил."""
+    with post.image.open('rb') as source:
+        data = reencode(source)
+    if data is None:
+        return False
+    old = post.image.name
+    stem = os.path.splitext(os.path.basename(old))[0]
+    name = post.image.storage.save(
+        post.image.field.generate_filename(post, f'{stem}.jpg'),
+        ContentFile(data),
+    )
+    if not Post.objects.filter(pk=post.pk, image=old).update(image=name):
+        # Картинку успели заменить, пока шло пересжатие.
+        post.image.storage.delete(name)
+        return False
+    post.image.name = name
+    delete_thumbnails(old)
+    return True
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer, WSGIRequestHandler
+)
+from django.core.wsgi import get_wsgi_application
+
+from posts.benchmark import percentile, scenarios
+from posts.models import Post
+
+# Страницы только на чтение: их и предлагалось сделать асинхронными.
+READ_VIEWS = ('index', 'group_list', 'profile', 'post_detail', 'follow_index')
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    """WSGI-приложение в потоковом сервере на свободном порту."""
+    server = ThreadedWSGIServer(
+        ('127.0.0.1', 0), QuietHandler, allow_reuse_address=False)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def fetch(request):
+    started = time.perf_counter()
+    try:
+        with urlopen(request, timeout=30) as response:
+            response.read()
+            ok = response.status < 400
+    except (HTTPError, URLError, OSError):
+        ok = False
+    return (time.perf_counter() - started) * 1000, ok
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает страницы чтения параллельными клиентами через '
+        'настоящий WSGI-сервер и выводит пропускную способность и '
+        'задержки. Данные берутся из текущей базы (manage.py seed); '
+        'с --url меряется внешний сервер на той же базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', default='1,8,32',
+            help='Число одновременных клиентов через запятую.')
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на страницу при каждом уровне.')
+        parser.add_argument(
+            '--views', default=','.join(READ_VIEWS),
+            help='Имена URL из posts.urls через запятую.')
+        parser.add_argument(
+            '--url',
+            help='Адрес уже запущенного сервера (например, gunicorn); '
+                 'без него поднимается встроенный потоковый.')
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        names = options['views'].split(',')
+        if not Post.objects.exists():
+            raise CommandError('База пуста: сначала manage.py seed.')
+        plans = scenarios()
+        unknown = set(names) - plans.keys()
+        if unknown:
+            raise CommandError(f'Нет сценария для: {", ".join(unknown)}')
+        server = None if options['url'] else serve()
+        base = options['url'] or f'http://127.0.0.1:{server.server_port}'
+        try:
+            for name in names:
+                request = self.request(base, plans[name])
+                # Прогрев: кэши и соединения с базой в потоках сервера.
+                fetch(request)
+                for level in levels:
+                    self.report(name, level, self.load(
+                        request, level, options['requests']))
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    @staticmethod
+    def request(base, scenario):
+        url = base.rstrip('/') + scenario.url
+        if scenario.data:
+            url += '?' + urlencode(scenario.data)
+        session = scenario.client.cookies.get(settings.SESSION_COOKIE_NAME)
+        headers = {}
+        if session is not None:
+            headers['Cookie'] = f'{session.key}={session.value}'
+        return Request(url, headers=headers)
+
+    @staticmethod
+    def load(request, level, total):
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            started = time.perf_counter()
+            results = list(pool.map(lambda _: fetch(request), range(total)))
+            elapsed = time.perf_counter() - started
+        return {
+            'rps': total / elapsed,
+            'timings': [timing for timing, _ in results],
+            'errors': sum(not ok for _, ok in results),
+        }
+
+    def report(self, name, level, result):
+        self.stdout.write(
+            f'{name} x{level}: {result["rps"]:.0f} запр/с, '
+            f'p50 {percentile(result["timings"], 0.5):.1f} мс, '
+            f'p95 {percentile(result["timings"], 0.95):.1f} мс, '
+            f'ошибок {result["errors"]}'
+        )
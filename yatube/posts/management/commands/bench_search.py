@@ -0,0 +1,83 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from faker.providers.lorem.ru_RU import Provider
+
+from posts.benchmark import percentile
+from posts.models import Post
+from posts.search import rebuild_index, search_posts
+from posts.utils import POST_PER_PAGE
+
+WORDS = Provider.word_list
+# Частоты слов по закону Ципфа, как в живом тексте.
+WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает полнотекстовый поиск с LIKE на синтетическом корпусе. '
+        'Корпус создаётся в транзакции и откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--words', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.build_corpus(rng, options['posts'], options['words'])
+            rebuild_index()
+            self.stdout.write(
+                f'Корпус из {options["posts"]} постов построен за '
+                f'{time.perf_counter() - started:.1f} с'
+            )
+            queries = [
+                ' '.join(rng.sample(WORDS, rng.choice((1, 2))))
+                for _ in range(options['queries'])
+            ]
+            for name, run in (
+                ('fts', self.run_search),
+                ('like', self.run_like),
+            ):
+                timings = [self.measure(run, query) for query in queries]
+                self.stdout.write(
+                    f'{name}: p50 {percentile(timings, 0.5):.1f} мс, '
+                    f'p95 {percentile(timings, 0.95):.1f} мс'
+                )
+            transaction.set_rollback(True)
+
+    def build_corpus(self, rng, total, words, batch_size=5000):
+        author = User.objects.create(username='bench_search_author')
+        for start in range(0, total, batch_size):
+            Post.objects.bulk_create(
+                Post(
+                    author=author,
+                    text=' '.join(rng.choices(WORDS, WEIGHTS, k=words)),
+                )
+                for _ in range(min(batch_size, total - start))
+            )
+
+    @staticmethod
+    def measure(run, query):
+        started = time.perf_counter()
+        run(query)
+        return (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def run_search(query):
+        results = search_posts(query)
+        results.count()
+        list(results[:POST_PER_PAGE])
+
+    @staticmethod
+    def run_like(query):
+        results = Post.objects.feed().filter(text__icontains=query)
+        results.count()
+        list(results.order_by('-pub_date', '-id')[:POST_PER_PAGE])
@@ -0,0 +1,113 @@
+import resource
+import shutil
+import tempfile
+import time
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from PIL import Image
+
+from posts import images, thumbnails
+from posts.benchmark import percentile
+from posts.models import Post
+
+# Поворот «камера набок» — чтобы в замер попал и exif_transpose.
+EXIF_ORIENTATION = 0x0112
+
+
+def parse_size(value):
+    try:
+        width, height = (int(side) for side in value.lower().split('x'))
+    except ValueError:
+        raise CommandError(f'Размер вида 4032x3024, а не {value!r}')
+    return width, height
+
+
+def photo(size):
+    """Градиент с шумом и EXIF — по весу близко к фото с телефона."""
+    image = Image.merge('RGB', [
+        Image.blend(
+            gradient('L').resize(size), Image.effect_noise(size, 16), 0.2)
+        for gradient in (
+            Image.linear_gradient,
+            Image.radial_gradient,
+            Image.linear_gradient,
+        )
+    ])
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6
+    output = BytesIO()
+    image.save(output, 'JPEG', quality=92, exif=exif.tobytes())
+    return output.getvalue()
+
+
+def peak_rss_kb():
+    # На Linux ru_maxrss в КБ; это пик всего процесса, он только растёт.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет обработку загруженной картинки: проверку в форме, '
+        'пересжатие и все варианты миниатюр. Файлы пишутся во временный '
+        'каталог, записи в базе откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1280x960,4032x3024,8000x5000',
+            help='Размеры исходных картинок через запятую.')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        sizes = sorted(
+            (parse_size(value) for value in options['sizes'].split(',')),
+            key=lambda size: size[0] * size[1],
+        )
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                with transaction.atomic():
+                    author = User.objects.create(
+                        username='bench_uploads_author')
+                    for size in sizes:
+                        self.report(size, self.measure(
+                            author, size, options['repeat']))
+                    transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    def measure(self, author, size, repeat):
+        data = photo(size)
+        wall, cpu = [], []
+        rss_before = peak_rss_kb()
+        for _ in range(repeat):
+            upload = SimpleUploadedFile(
+                'photo.jpg', data, content_type='image/jpeg')
+            started = time.perf_counter(), time.process_time()
+            images.validate(upload)
+            post = Post.objects.create(
+                author=author, text='Замер', image=upload)
+            thumbnails.generate(post)
+            wall.append((time.perf_counter() - started[0]) * 1000)
+            cpu.append((time.process_time() - started[1]) * 1000)
+        return {
+            'source_kb': len(data) // 1024,
+            'stored_kb': post.image.size // 1024,
+            'wall': wall,
+            'cpu': cpu,
+            'rss_kb': peak_rss_kb() - rss_before,
+        }
+
+    def report(self, size, result):
+        self.stdout.write(
+            f'{size[0]}x{size[1]}: {result["source_kb"]} КБ -> '
+            f'{result["stored_kb"]} КБ, '
+            f'время p50 {percentile(result["wall"], 0.5):.0f} мс, '
+            f'CPU p50 {percentile(result["cpu"], 0.5):.0f} мс, '
+            f'рост пика RSS {result["rss_kb"]} КБ'
+        )
@@ -0,0 +1,95 @@
+import json
+import platform
+import sys
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+from django.utils import timezone
+
+from posts.benchmark import compare, run
+from posts.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет все страницы posts.urls через тестовый клиент на '
+        'синтетических данных разного объёма во временной базе и '
+        'сохраняет p50/p95, число запросов и пик памяти в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1000,10000',
+            help='Число постов через запятую')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Куда сохранить JSON')
+        parser.add_argument('--compare', help='JSON прошлого прогона')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост p95 (доля) при сравнении')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        results = {}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True)
+        try:
+            for size in sizes:
+                call_command('flush', interactive=False, verbosity=0)
+                with transaction.atomic():
+                    seed(
+                        users=max(size // 10, 20),
+                        posts=size,
+                        comments=size * 2,
+                        follows=max(size // 2, 100),
+                        seed=options['seed'],
+                    )
+                self.stderr.write(f'Данные: {size} постов')
+                results[str(size)] = run(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        report = {
+            'meta': {
+                'date': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        self.print_table(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as source:
+                baseline = json.load(source)['results']
+            regressions = compare(baseline, results, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Регрессии:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def print_table(self, results):
+        write = self.stdout.write
+        write(
+            f'{"posts":>7} {"url":<24} {"first":>8} {"p50":>8} '
+            f'{"p95":>8} {"queries":>7} {"peak KB":>9}'
+        )
+        for size, pages in results.items():
+            for name, row in pages.items():
+                write(
+                    f'{size:>7} {name:<24} {row["first_ms"]:>8} '
+                    f'{row["p50_ms"]:>8} {row["p95_ms"]:>8} '
+                    f'{row["queries"]:>7} {row["peak_kb"]:>9}'
+                )
+        sys.stdout.flush()
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Post
+from posts.transfer import (
+    COMMENT_COLUMNS, FORMATS, POST_COLUMNS, export_rows, write_records
+)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты (или комментарии) в NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для записи, «-» — стандартный вывод')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--comments', action='store_true',
+            help='Выгрузить комментарии вместо постов')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson')
+        model, columns = (
+            (Comment, COMMENT_COLUMNS) if options['comments']
+            else (Post, POST_COLUMNS)
+        )
+        rows = export_rows(model, columns)
+        if path == '-':
+            count = write_records(rows, self.stdout, fmt, columns)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as output:
+                count = write_records(rows, output, fmt, columns)
+        self.stderr.write(f'Выгружено записей: {count}')
@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from posts.transfer import BATCH_SIZE, FORMATS, Importer, InvalidRecord
+from posts.transfer import read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты (или комментарии) из NDJSON или CSV, '
+        'созданного export_posts. Импорт идёт одной транзакцией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл для чтения, «-» — стандартный ввод')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--comments', action='store_true',
+            help='Загрузить комментарии вместо постов')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson')
+        started = time.perf_counter()
+        if path == '-':
+            count = self.load(sys.stdin, fmt, options)
+        else:
+            with open(path, encoding='utf-8', newline='') as source:
+                count = self.load(source, fmt, options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {count} '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
+
+    def load(self, source, fmt, options):
+        importer = Importer(options['batch_size'])
+        records = read_records(source, fmt)
+        try:
+            with transaction.atomic():
+                if options['comments']:
+                    count = importer.import_comments(records)
+                else:
+                    count = importer.import_posts(records)
+                importer.finish()
+        except (InvalidRecord, IntegrityError) as error:
+            raise CommandError(error) from error
+        return count
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import recompute
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярных постов. Рейтинг убывает со '
+        'временем, поэтому команду запускают по расписанию, например '
+        'раз в пять минут.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано постов: {recompute()}'
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.group_stats import refresh
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводку всех групп для каталога /groups/.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано групп: {refresh()}'
+        ))
@@ -0,0 +1,29 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.digests import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает подписчикам по одному письму с новыми постами их '
+        'авторов. Запускается по расписанию, например раз в час.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delay', type=int, default=0,
+            help='Не трогать события моложе стольких минут: посты '
+                 'последних минут уйдут следующим дайджестом.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        until = timezone.now() - timedelta(minutes=options['delay'])
+        messages, events = send_digests(until)
+        self.stdout.write(
+            f'Писем: {messages}, событий: {events}, '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
@@ -0,0 +1,26 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Готовит миниатюры: то же, что run_workers --queues thumbnails. '
+        'Оставлена для совместимости.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2)
+        parser.add_argument('--batch', type=int, default=10)
+        parser.add_argument('--poll', type=float, default=2)
+        parser.add_argument('--once', action='store_true')
+
+    def handle(self, *args, **options):
+        arguments = [
+            '--queues', 'thumbnails',
+            '--threads', str(options['threads']),
+            '--batch', str(options['batch']),
+            '--poll', str(options['poll']),
+        ]
+        if options['once']:
+            arguments.append('--once')
+        call_command('run_workers', *arguments, stdout=self.stdout)
@@ -0,0 +1,50 @@
+import json
+
+from django.db import migrations
+
+JOB_NAME = 'posts.thumbnails.make_thumbnails'
+
+
+def move_jobs(apps, schema_editor):
+    """Незавершённые задачи миниатюр переезжают в очередь core.Job."""
+    ThumbnailJob = apps.get_model('posts', 'ThumbnailJob')
+    Job = apps.get_model('core', 'Job')
+    post_ids = ThumbnailJob.objects.filter(
+        status__in=('pending', 'running')
+    ).values_list('post_id', flat=True).distinct()
+    Job.objects.bulk_create(
+        Job(
+            queue='thumbnails',
+            name=JOB_NAME,
+            payload=json.dumps({'post_id': post_id}),
+            key=f'thumbnails:{post_id}',
+            max_attempts=3,
+        )
+        for post_id in post_ids
+    )
+
+
+def restore_jobs(apps, schema_editor):
+    ThumbnailJob = apps.get_model('posts', 'ThumbnailJob')
+    Job = apps.get_model('core', 'Job')
+    ThumbnailJob.objects.bulk_create(
+        ThumbnailJob(post_id=json.loads(payload)['post_id'])
+        for payload in Job.objects.filter(
+            name=JOB_NAME, status='pending'
+        ).values_list('payload', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('posts', '0011_post_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_jobs, restore_jobs),
+        migrations.DeleteModel(
+            name='ThumbnailJob',
+        ),
+    ]
@@ -1,8 +1,24 @@
+import json
+import threading
+from contextlib import contextmanager
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Колонки, которые шаблоны ленты никогда не выводят.
+FEED_DEFERRED_FIELDS = (
+    'author__password',
+    'author__last_login',
+    'author__email',
+    'author__is_superuser',
+    'author__is_staff',
+    'author__is_active',
+    'author__date_joined',
+    'group__description',
+)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -13,6 +29,68 @@ class Group(models.Model):
         return self.title
 
 
+class GroupStats(models.Model):
+    """Сводка группы для каталога; пересчитывает posts.group_stats."""
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        verbose_name='Группа'
+    )
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    last_post_at = models.DateTimeField(
+        'Последний пост', null=True, blank=True)
+    # [[имя, постов], ...] — самые активные авторы группы.
+    top_authors = models.TextField('Активные авторы (JSON)', default='[]')
+    refreshed = models.DateTimeField('Пересчитано', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+    def __str__(self):
+        return f'Статистика {self.group}'
+
+    def authors(self):
+        return json.loads(self.top_authors)
+
+
+# id постов, которые сейчас удаляются в этом потоке вместе с
+# комментариями (ставит pre_delete в posts.signals).
+_deleting = threading.local()
+
+
+def deleting_posts():
+    if not hasattr(_deleting, 'ids'):
+        _deleting.ids = set()
+    return _deleting.ids
+
+
+@contextmanager
+def forget_deleted_posts():
+    """Снимает отметки, поставленные за время удаления, даже если оно
+    откатилось и post_delete не пришёл."""
+    before = set(deleting_posts())
+    try:
+        yield
+    finally:
+        deleting_posts().intersection_update(before)
+
+
+class PostQuerySet(models.QuerySet):
+    def delete(self):
+        with forget_deleted_posts():
+            return super().delete()
+
+    def feed(self):
+        """Посты для лент: автор и группа в одном запросе."""
+        return (
+            self.select_related('author', 'group')
+            .defer(*FEED_DEFERRED_FIELDS)
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -42,15 +120,54 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+    thumbnails_ready = models.BooleanField(
+        'Миниатюры готовы',
+        default=False,
+        editable=False
+    )
+    hot_score = models.FloatField(
+        'Рейтинг популярности',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=('-hot_score', '-id'),
+                name='post_hot_score_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:15]
 
+    def delete(self, *args, **kwargs):
+        with forget_deleted_posts():
+            return super().delete(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -73,6 +190,18 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_post_created_idx'
+            ),
+            models.Index(
+                fields=('created',),
+                name='comment_created_idx'
+            ),
+        )
+
     def __str__(self):
         return self.text
 
@@ -94,6 +223,111 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='prevent_self_follow'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_user_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок читателя."""
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE,
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='timeline_entries',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые обновляются при записи."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    follower_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return f'Статистика {self.user}'
+
+
+class NotificationEvent(models.Model):
+    """Новый пост, о котором подписчикам ещё не написали в дайджесте."""
+    post = models.ForeignKey(
+        Post,
+        related_name='notification_events',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='notification_events',
+        on_delete=models.CASCADE,
+        verbose_name='Автор'
+    )
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Событие рассылки'
+        verbose_name_plural = 'События рассылки'
+        indexes = (
+            models.Index(
+                fields=('sent', 'created'),
+                name='notification_pending_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'Пост {self.post_id} для подписчиков {self.author}'
@@ -0,0 +1,145 @@
+"""Полнотекстовый поиск по постам.
+
+В SQLite — виртуальная таблица FTS5 ``posts_post_fts`` (rowid = id
+поста), её синхронизируют сигналы Post. В PostgreSQL — GIN-индекс по
+to_tsvector, который база поддерживает сама. На остальных бэкендах
+остаётся поиск по вхождению подстроки.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+PG_CONFIG = 'russian'
+PG_VECTOR = f"to_tsvector('{PG_CONFIG}', posts_post.text)"
+PG_QUERY = f"plainto_tsquery('{PG_CONFIG}', %s)"
+
+WORD = re.compile(r'\w+')
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Запрос пользователя -> выражение MATCH: все слова, без операторов."""
+    words = WORD.findall(query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def index_post(post):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text],
+        )
+
+
+def unindex_post(post_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def index_posts(posts):
+    """Переиндексирует посты из QuerySet двумя запросами."""
+    if not fts_enabled():
+        return
+    ids, id_params = posts.order_by().values('pk').query.sql_with_params()
+    rows, row_params = posts.order_by().values_list(
+        'pk', 'text').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({ids})', id_params)
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) {rows}', row_params)
+
+
+def rebuild_index():
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}'
+        )
+
+
+class FtsResults:
+    """Результаты FTS5 в порядке релевантности; понимает срезы и count().
+
+    Paginator выбирает через них только id нужной страницы, а посты
+    загружаются одним запросом ленты.
+    """
+
+    def __init__(self, match, queryset):
+        self.match = match
+        self.queryset = queryset
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        limit = -1 if index.stop is None else index.stop - start
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, limit, start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query, queryset=None):
+    """Посты по запросу, от самых релевантных."""
+    queryset = Post.objects.feed() if queryset is None else queryset
+    match = match_expression(query)
+    if not match:
+        return queryset.none()
+    if fts_enabled():
+        return FtsResults(match, queryset)
+    if connection.vendor == 'postgresql':
+        return queryset.annotate(
+            rank=RawSQL(f'ts_rank({PG_VECTOR}, {PG_QUERY})', [query])
+        ).extra(
+            where=[f'{PG_VECTOR} @@ {PG_QUERY}'], params=[query]
+        ).order_by('-rank', '-pub_date')
+    return queryset.filter(text__icontains=query)
+
+
+def filter_posts(queryset, query):
+    """Фильтр без ранжирования — для админки и прочих QuerySet."""
+    match = match_expression(query)
+    if not match:
+        return queryset.none()
+    if fts_enabled():
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [match],
+        ))
+    if connection.vendor == 'postgresql':
+        return queryset.extra(
+            where=[f'{PG_VECTOR} @@ {PG_QUERY}'], params=[query])
+    return queryset.filter(text__icontains=query)
@@ -0,0 +1,140 @@
+"""Синтетические данные для нагрузочных замеров.
+
+Популярность авторов, групп и постов распределена по степенному закону
+(Ципфа): немногие авторы собирают большинство подписчиков, немногие
+посты — большинство комментариев. Посты и комментарии загружаются
+через transfer.Importer, то есть тем же путём, что и импорт.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+from faker import Faker
+
+from . import counters
+from .models import Follow, Group, Post
+from .transfer import Importer
+
+EXPONENT = 1.1
+PERIOD = timedelta(days=365)
+BATCH_SIZE = 2000
+
+
+def zipf_weights(count, exponent=EXPONENT):
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def zipf_picker(rng, population):
+    """Выбор элемента: первые в списке выпадают чаще остальных."""
+    cum_weights = list(accumulate(zipf_weights(len(population))))
+
+    def pick():
+        return rng.choices(population, cum_weights=cum_weights)[0]
+    return pick
+
+
+def seed(users=1000, groups=20, posts=10000, comments=20000,
+         follows=5000, seed=0):
+    """Добавляет данные в базу; вызывать внутри transaction.atomic()."""
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    user_ids = create_users(fake, users)
+    usernames = dict(
+        User.objects.filter(pk__in=user_ids).values_list('pk', 'username'))
+    slugs = create_groups(fake, groups)
+    # Порядок в списке задаёт популярность: первые — самые активные.
+    rng.shuffle(user_ids)
+    create_follows(rng, user_ids, follows)
+    importer = Importer(BATCH_SIZE)
+    importer.import_posts(
+        post_records(rng, fake, user_ids, usernames, slugs, posts))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    rng.shuffle(post_ids)
+    importer.import_comments(
+        comment_records(rng, fake, user_ids, usernames, post_ids, comments))
+    importer.finish()
+    counters.recount_users()
+
+
+def create_users(fake, count):
+    last = User.objects.order_by('-pk').values_list('pk', flat=True).first()
+    password = make_password(None)
+    User.objects.bulk_create(
+        (
+            User(
+                username=f'{fake.user_name()}_{number}',
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+                password=password,
+            )
+            for number in range(count)
+        ),
+    )
+    return list(User.objects.filter(pk__gt=last or 0).values_list(
+        'pk', flat=True))
+
+
+def create_groups(fake, count):
+    start = Group.objects.count()
+    groups = [
+        Group(
+            title=fake.sentence(nb_words=3).rstrip('.'),
+            slug=f'group-{start + number}',
+            description=fake.paragraph(),
+        )
+        for number in range(count)
+    ]
+    Group.objects.bulk_create(groups)
+    return [group.slug for group in groups]
+
+
+def create_follows(rng, user_ids, count):
+    pick_author = zipf_picker(rng, user_ids)
+    pairs = (
+        (rng.choice(user_ids), pick_author()) for _ in range(count))
+    Follow.objects.bulk_create(
+        (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in pairs
+            if user_id != author_id
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def random_date(rng, now):
+    return (now - PERIOD * rng.random()).isoformat()
+
+
+def post_records(rng, fake, user_ids, usernames, slugs, count):
+    now = timezone.now()
+    pick_author = zipf_picker(rng, user_ids)
+    pick_group = zipf_picker(rng, slugs)
+    for _ in range(count):
+        group = None
+        if slugs and rng.random() < 0.5:
+            group = pick_group()
+        yield {
+            'author': usernames[pick_author()],
+            'group': group,
+            'text': fake.paragraph(nb_sentences=rng.randint(1, 8)),
+            'pub_date': random_date(rng, now),
+        }
+
+
+def comment_records(rng, fake, user_ids, usernames, post_ids, count):
+    if not post_ids:
+        return
+    now = timezone.now()
+    pick_post = zipf_picker(rng, post_ids)
+    for _ in range(count):
+        yield {
+            'post': pick_post(),
+            'author': usernames[rng.choice(user_ids)],
+            'text': fake.sentence(),
+            'created': random_date(rng, now),
+        }
@@ -0,0 +1,135 @@
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from . import (
+    counters, digests, group_stats, search, timeline, trending
+)
+from .feed_cache import invalidate, invalidate_author_feeds
+from .models import (
+    Comment, Follow, Group, Post, User, UserStats, deleting_posts
+)
+
+
+def invalidate_post_feeds(post_id):
+    invalidate(f'post:{post_id}')
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True).first()
+    if author_id is not None:
+        invalidate_author_feeds(author_id)
+
+
+def invalidate_group_feeds(group):
+    # Снимки лент хранят посты вместе с группой: ссылка на группу в
+    # карточке должна смениться вместе со slug.
+    invalidate('index')
+    invalidate('trending')
+    authors = Post.objects.filter(group=group).order_by().values_list(
+        'author_id', flat=True).distinct()
+    for author_id in authors:
+        invalidate(f'profile:{author_id}')
+
+
+def invalidate_follow_pages(follow):
+    # Счётчики подписок и кнопка «Подписаться» в профилях.
+    invalidate(f'profile:{follow.user_id}')
+    invalidate(f'profile:{follow.author_id}')
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, update_fields=None,
+               **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    # Имя автора выводится в профиле и в карточках его постов во всех
+    # снимках лент; id удалённого пользователя может достаться новому.
+    invalidate(f'profile:{instance.pk}')
+    if not created:
+        invalidate('index')
+        invalidate('trending')
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    # Группа на момент загрузки: при смене пересчитываются обе.
+    # __dict__ — чтобы не загружать отложенное поле.
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user_stats(instance.author_id, post_count=1)
+        timeline.fan_out(instance)
+        digests.record(instance)
+        group_stats.schedule_refresh(instance.group_id)
+        trending.schedule_recompute()
+    elif not raw and instance._loaded_group_id != instance.group_id:
+        group_stats.schedule_refresh(instance._loaded_group_id)
+        group_stats.schedule_refresh(instance.group_id)
+    instance._loaded_group_id = instance.group_id
+    search.index_post(instance)
+    invalidate_author_feeds(instance.author_id)
+    invalidate(f'post:{instance.pk}')
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    # Каскад удалит комментарии поста раньше него самого: счётчик и
+    # ленты удаляемого поста по каждому комментарию трогать незачем.
+    deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    deleting_posts().discard(instance.pk)
+    counters.change_user_stats(instance.author_id, post_count=-1)
+    group_stats.schedule_refresh(instance.group_id)
+    search.unindex_post(instance.pk)
+    invalidate_author_feeds(instance.author_id)
+    invalidate(f'post:{instance.pk}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, created=False, **kwargs):
+    # pre_delete — пока у постов ещё не обнулена группа.
+    invalidate('groups')
+    if not created:
+        invalidate_group_feeds(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_comment_count(instance.post_id, 1)
+        invalidate_post_feeds(instance.post_id)
+        trending.schedule_recompute()
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in deleting_posts():
+        return
+    counters.change_comment_count(instance.post_id, -1)
+    invalidate_post_feeds(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user_stats(instance.user_id, following_count=1)
+        counters.change_user_stats(instance.author_id, follower_count=1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        invalidate_follow_pages(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_user_stats(instance.user_id, following_count=-1)
+    counters.change_user_stats(instance.author_id, follower_count=-1)
+    timeline.prune(instance.user_id, instance.author_id)
+    invalidate_follow_pages(instance)
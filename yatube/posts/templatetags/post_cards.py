@@ -0,0 +1,54 @@
+"""Кэширование отрендеренных карточек постов.
+
+Ключ карточки — id поста и версия, вычисленная из всех полей, которые
+выводит шаблон (включая автора и группу). Сохранение поста или правка
+автора/группы меняет версию, и карточка перерисовывается; старые
+версии просто истекают. Лента собирается одним cache.get_many().
+"""
+import hashlib
+
+from django import template
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+CARD_TIMEOUT = 60 * 60 * 24
+
+
+def card_version(post):
+    author = post.author
+    group = post.group
+    fields = (
+        post.text,
+        post.pub_date.isoformat(),
+        post.image.name,
+        post.comment_count,
+        post.thumbnails_ready,
+        author.username,
+        author.first_name,
+        author.last_name,
+        group.slug if group else None,
+    )
+    return hashlib.md5(repr(fields).encode()).hexdigest()
+
+
+def card_key(post):
+    return f'post_card:{post.pk}:{card_version(post)}'
+
+
+@register.filter
+def post_cards(posts):
+    """Список HTML карточек постов в том же порядке."""
+    keys = [card_key(post) for post in posts]
+    cards = caches['feed'].get_many(keys)
+    missing = {}
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            missing[key] = render_to_string(CARD_TEMPLATE, {'post': post})
+    if missing:
+        caches['feed'].set_many(missing, CARD_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,28 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size='card'):
+    """Готовая миниатюра или None; при None пост уходит в очередь,
+    если его картинку ещё не пытались обработать безуспешно."""
+    if not post.image:
+        return None
+    thumbnail = thumbnails.cached_thumbnail(post.image, size)
+    if thumbnail is None:
+        thumbnails.schedule_missing(post)
+    return thumbnail
+
+
+@register.simple_tag
+def post_srcset(post):
+    """srcset из уже готовых вариантов карточки."""
+    parts = []
+    for width, size in thumbnails.CARD_SRCSET.items():
+        thumbnail = thumbnails.cached_thumbnail(post.image, size)
+        if thumbnail is not None:
+            parts.append(f'{thumbnail.url} {width}w')
+    return ', '.join(parts)
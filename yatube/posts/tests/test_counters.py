@@ -0,0 +1,123 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+
+    def assertStats(self, user, **expected):
+        stats = UserStats.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(user=user, field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def test_post_count(self):
+        post = Post.objects.create(author=self.author, text='Test-post')
+        Post.objects.create(author=self.author, text='Test-post-2')
+        self.assertStats(self.author, post_count=2)
+        post.delete()
+        self.assertStats(self.author, post_count=1)
+
+    def test_follow_counts(self):
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assertStats(self.author, follower_count=1, following_count=0)
+        self.assertStats(self.follower, follower_count=0, following_count=1)
+        follow.delete()
+        self.assertStats(self.author, follower_count=0)
+        self.assertStats(self.follower, following_count=0)
+
+    def test_comment_count(self):
+        post = Post.objects.create(author=self.author, text='Test-post')
+        comment = Comment.objects.create(
+            post=post, author=self.follower, text='Test-comment')
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    def test_missing_stats_row_is_recreated(self):
+        UserStats.objects.filter(user=self.author).delete()
+        Post.objects.create(author=self.author, text='Test-post')
+        self.assertStats(self.author, post_count=1)
+
+    def test_recount_stats_repairs_drift(self):
+        post = Post.objects.create(author=self.author, text='Test-post')
+        Comment.objects.create(
+            post=post, author=self.follower, text='Test-comment')
+        Follow.objects.create(user=self.follower, author=self.author)
+        UserStats.objects.update(
+            post_count=7, follower_count=7, following_count=7)
+        Post.objects.update(comment_count=7)
+        call_command('recount_stats', stdout=StringIO())
+        self.assertStats(
+            self.author, post_count=1, follower_count=1, following_count=0)
+        self.assertStats(
+            self.follower, post_count=0, follower_count=0, following_count=1)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+    def test_counters_do_not_go_negative(self):
+        post = Post.objects.create(author=self.author, text='Test-post')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.follower, text='Test-comment')
+            for _ in range(2)
+        )
+        Comment.objects.filter(post=post).first().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        UserStats.objects.filter(user=self.author).update(post_count=0)
+        post.delete()
+        self.assertStats(self.author, post_count=0)
+
+    def test_post_delete_skips_per_comment_work(self):
+        queries = []
+        for count in (1, 20):
+            post = Post.objects.create(author=self.author, text='Test-post')
+            for _ in range(count):
+                Comment.objects.create(
+                    post=post, author=self.follower, text='Test-comment')
+            with CaptureQueriesContext(connection) as captured:
+                post.delete()
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+        comment_post = Post.objects.create(
+            author=self.author, text='Test-post')
+        comment = Comment.objects.create(
+            post=comment_post, author=self.follower, text='Test-comment')
+        comment.delete()
+        comment_post.refresh_from_db()
+        self.assertEqual(comment_post.comment_count, 0)
+
+    def test_failed_post_delete_does_not_leave_marks(self):
+        post = Post.objects.create(author=self.author, text='Test-post')
+        comments = [
+            Comment.objects.create(
+                post=post, author=self.follower, text='Test-comment')
+            for _ in range(2)
+        ]
+        for delete in (post.delete, Post.objects.filter(pk=post.pk).delete):
+            with self.subTest(delete=delete):
+                # Падает сам DELETE: после pre_delete, до post_delete.
+                with mock.patch(
+                    'django.db.models.sql.DeleteQuery.delete_batch',
+                    side_effect=RuntimeError,
+                ), self.assertRaises(RuntimeError), transaction.atomic():
+                    delete()
+        comments[0].delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import digests
+from posts.digests import DIGEST_POSTS, send_digests
+from posts.models import Follow, NotificationEvent, Post
+
+User = get_user_model()
+
+TEMP_EMAIL_PATH = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class DigestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com')
+        cls.silent = User.objects.create_user(username='silent')
+        for author in (cls.author, cls.other):
+            Follow.objects.create(user=cls.reader, author=author)
+        Follow.objects.create(user=cls.silent, author=cls.author)
+
+    def test_one_event_per_post(self):
+        post = Post.objects.create(author=self.author, text='Test-post')
+        self.assertEqual(
+            list(NotificationEvent.objects.values_list('post', 'author')),
+            [(post.pk, self.author.pk)]
+        )
+
+    def test_one_message_per_follower(self):
+        Post.objects.create(author=self.author, text='First-post')
+        Post.objects.create(author=self.other, text='Second-post')
+        self.assertEqual(send_digests(), (1, 2))
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['reader@example.com'])
+        self.assertIn('First-post', message.body)
+        self.assertIn('Second-post', message.body)
+        self.assertFalse(
+            NotificationEvent.objects.filter(sent__isnull=True).exists())
+        self.assertEqual(send_digests(), (0, 0))
+
+    def test_late_event_is_not_marked_sent(self):
+        Post.objects.create(author=self.author, text='First-post')
+        late = []
+        original = digests.subscribers
+
+        def subscribers(author_ids):
+            # Событие с created до until, закоммиченное после чтения.
+            late.append(Post.objects.create(
+                author=self.other, text='Late-post'))
+            NotificationEvent.objects.filter(post=late[0]).update(
+                created=timezone.now() - timedelta(minutes=1))
+            return original(author_ids)
+
+        with mock.patch.object(digests, 'subscribers', subscribers):
+            self.assertEqual(send_digests(), (1, 1))
+        self.assertTrue(NotificationEvent.objects.filter(
+            post=late[0], sent__isnull=True).exists())
+        send_digests()
+        self.assertIn('Late-post', mail.outbox[-1].body)
+
+    def test_long_digest_truncated(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Post-{number}')
+            for number in range(DIGEST_POSTS + 3)
+        )
+        NotificationEvent.objects.bulk_create(
+            NotificationEvent(post=post, author=self.author)
+            for post in Post.objects.all()
+        )
+        send_digests()
+        self.assertIn('И ещё постов: 3', mail.outbox[0].body)
+
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend',
+        EMAIL_FILE_PATH=TEMP_EMAIL_PATH,
+    )
+    def test_single_connection_for_many_followers(self):
+        User.objects.bulk_create(
+            User(username=f'reader{number}', email=f'r{number}@example.com')
+            for number in range(250)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=reader, author=self.author)
+            for reader in User.objects.filter(username__startswith='reader')
+            .exclude(pk=self.reader.pk)
+        )
+        Post.objects.create(author=self.author, text='Test-post')
+        try:
+            out = StringIO()
+            call_command('send_digests', stdout=out)
+            self.assertIn('Писем: 251, событий: 1', out.getvalue())
+            # Файловый бэкенд пишет отдельный файл на каждое соединение.
+            self.assertEqual(len(os.listdir(TEMP_EMAIL_PATH)), 1)
+        finally:
+            shutil.rmtree(TEMP_EMAIL_PATH, ignore_errors=True)
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase
+
+from posts import feed_cache
+from posts.feed_cache import cached_page, get_generation, page_key
+
+
+class ColdMissTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        caches['feed'].clear()
+        self.key = page_key('test', 'variant')
+        cache.add(f'{self.key}:lock', True)
+        self.compute = mock.Mock(return_value='fresh')
+
+    def test_waits_for_lock_holder(self):
+        generation = get_generation('test')
+
+        def other_worker_done(seconds):
+            caches['feed'].set(
+                self.key, {'generation': generation, 'page': 'built'})
+
+        with mock.patch('posts.feed_cache.time.sleep', other_worker_done):
+            page = cached_page('test', 'variant', self.compute)
+        self.assertEqual(page, ('built', generation))
+        self.compute.assert_not_called()
+
+    def test_computes_after_wait(self):
+        with mock.patch.object(feed_cache, 'LOCK_WAIT', 0.01), \
+                mock.patch.object(feed_cache, 'LOCK_POLL', 0):
+            page, _ = cached_page('test', 'variant', self.compute)
+        self.assertEqual(page, 'fresh')
+        self.compute.assert_called_once()
+        self.assertTrue(cache.get(f'{self.key}:lock'))
+
+    def test_cold_miss_takes_lock(self):
+        cache.delete(f'{self.key}:lock')
+
+        def compute():
+            self.assertTrue(cache.get(f'{self.key}:lock'))
+            return 'fresh'
+
+        page, _ = cached_page('test', 'variant', compute)
+        self.assertEqual(page, 'fresh')
+        self.assertIsNone(cache.get(f'{self.key}:lock'))
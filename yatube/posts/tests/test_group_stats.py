@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Job
+from posts.group_stats import refresh
+from posts.models import Group, GroupStats, Post
+from posts.utils import POST_PER_PAGE
+
+User = get_user_model()
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Test-group', slug='test-slug', description='Test')
+        cls.group_2 = Group.objects.create(
+            title='Test-group-2', slug='test-slug-2', description='Test')
+
+    def setUp(self):
+        cache.clear()
+
+    def refresh_jobs(self):
+        return Job.objects.filter(
+            key__startswith='group_stats:', status=Job.PENDING)
+
+    def run_refresh_jobs(self):
+        self.refresh_jobs().update(run_at=timezone.now())
+        call_command(
+            'run_workers', '--queues', 'stats', '--threads', '0', '--once',
+            stdout=StringIO())
+
+    def test_refresh(self):
+        for author, count in ((self.author, 2), (self.other, 1)):
+            for _ in range(count):
+                Post.objects.create(
+                    author=author, group=self.group, text='Test-post')
+        self.assertEqual(refresh(), 2)
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.post_count, 3)
+        self.assertEqual(
+            stats.last_post_at, Post.objects.latest('pub_date').pub_date)
+        self.assertEqual(stats.authors(), [['author', 2], ['other', 1]])
+        empty = GroupStats.objects.get(group=self.group_2)
+        self.assertEqual((empty.post_count, empty.authors()), (0, []))
+
+    def test_post_changes_schedule_refresh(self):
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Test-post')
+        self.assertEqual(
+            list(self.refresh_jobs().values_list('key', flat=True)),
+            [f'group_stats:{self.group.pk}'])
+        self.run_refresh_jobs()
+        self.assertEqual(self.group.stats.post_count, 1)
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'Edited'
+        post.save()
+        self.assertFalse(self.refresh_jobs().exists())
+        post.group = self.group_2
+        post.save()
+        self.assertEqual(self.refresh_jobs().count(), 2)
+        self.run_refresh_jobs()
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 0)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group_2).post_count, 1)
+        post.delete()
+        self.assertEqual(self.refresh_jobs().count(), 1)
+
+    def test_groups_page(self):
+        Group.objects.bulk_create(
+            Group(title=f'Group-{number:02}', slug=f'group-{number}')
+            for number in range(POST_PER_PAGE)
+        )
+        Post.objects.create(
+            author=self.author, group=self.group, text='Test-post')
+        refresh()
+        url = reverse('posts:groups')
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['page_obj']), POST_PER_PAGE)
+        response = self.client.get(url, {'page': 2})
+        self.assertContains(response, 'Test-group')
+        self.assertContains(response, 'Постов: 1')
+        self.assertContains(
+            response, reverse('posts:profile', args=['author']))
+
+    def test_groups_page_invalidated(self):
+        url = reverse('posts:groups')
+        self.assertNotContains(self.client.get(url), 'Постов: 1')
+        Post.objects.create(
+            author=self.author, group=self.group, text='Test-post')
+        refresh()
+        self.assertContains(self.client.get(url), 'Постов: 1')
+        Group.objects.create(title='New-group', slug='new-slug')
+        self.assertContains(self.client.get(url), 'New-group')
@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import images
+from posts.models import Post
+from posts.thumbnails import CARD_SRCSET
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def upload(size=(64, 32), image_format='JPEG', orientation=None):
+    image = Image.new('RGB', size, 'red')
+    options = {}
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        options['exif'] = exif.tobytes()
+    output = BytesIO()
+    image.save(output, image_format, **options)
+    return SimpleUploadedFile(
+        f'photo.{image_format.lower()}', output.getvalue(),
+        content_type=f'image/{image_format.lower()}')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImagePipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_validate_limits(self):
+        cases = {
+            'file_too_large': (mock.patch.object(images, 'MAX_BYTES', 10),
+                               upload()),
+            'too_many_pixels': (mock.patch.object(images, 'MAX_PIXELS', 100),
+                                upload()),
+            'invalid_image': (mock.patch.object(images, 'MAX_BYTES', 1000),
+                              SimpleUploadedFile('photo.jpg', b'not image')),
+        }
+        for code, (limit, file) in cases.items():
+            with self.subTest(code=code), limit:
+                with self.assertRaises(ValidationError) as error:
+                    images.validate(file)
+                self.assertEqual(error.exception.code, code)
+
+    def test_form_rejects_large_image(self):
+        with mock.patch.object(images, 'MAX_PIXELS', 100):
+            response = self.authorized_client.post(
+                reverse('posts:post_create'),
+                {'text': 'Post-with-image', 'image': upload()},
+            )
+        self.assertFormError(
+            response, 'form', 'image', 'Изображение больше 0 мегапикселей.')
+        self.assertFalse(Post.objects.exists())
+
+    def test_worker_normalizes_image(self):
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Post-with-image',
+            'image': upload((300, 100), 'PNG'),
+        })
+        post = Post.objects.get()
+        original = post.image.name
+        with mock.patch.object(images, 'MAX_SIDE', 150):
+            call_command('thumbnail_worker', '--once', '--threads', '0',
+                         stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        self.assertFalse(post.image.storage.exists(original))
+        with Image.open(post.image) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (150, 50))
+        response = self.authorized_client.get(reverse('posts:index'))
+        for width in CARD_SRCSET:
+            self.assertContains(response, f' {width}w')
+
+    def test_exif_applied_and_stripped(self):
+        data = images.reencode(upload((40, 20), orientation=6))
+        with Image.open(BytesIO(data)) as image:
+            self.assertEqual(image.size, (20, 40))
+            self.assertNotIn('exif', image.info)
+
+    def test_normalized_image_kept(self):
+        self.assertIsNone(images.reencode(upload()))
+
+    def test_bench_uploads(self):
+        out = StringIO()
+        call_command(
+            'bench_uploads', '--sizes', '64x48', '--repeat', '1', stdout=out)
+        self.assertIn('64x48:', out.getvalue())
@@ -0,0 +1,77 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+POSTS_NUM = 30
+
+# Строка плана SQLite без индекса: «SCAN posts_post» или «SCAN TABLE …».
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>posts_\w+)( AS \w+)?$')
+# Сортировка не по индексу: база читает весь диапазон, чтобы упорядочить.
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (RIGHT PART OF )?ORDER BY')
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class FeedQueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Test-group',
+            slug='test-slug',
+            description='Test-description',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(POSTS_NUM):
+            post = Post.objects.create(
+                author=cls.author,
+                text=f'Test-text {i}',
+                group=cls.group,
+            )
+            Comment.objects.create(
+                text='Test-comment', author=cls.user, post=post)
+        cls.post = post
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN есть только в SQLite')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_feed_queries_use_indexes(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': self.author.username}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        for url in urls:
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                for detail in explain(query['sql']):
+                    with self.subTest(url=url, sql=query['sql']):
+                        self.assertIsNone(FULL_SCAN.match(detail), detail)
+                        self.assertIsNone(TEMP_SORT.search(detail), detail)
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import FTS_TABLE, match_expression, search_posts
+from posts.utils import POST_PER_PAGE
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+
+    def search(self, query):
+        return list(search_posts(query)[:POST_PER_PAGE])
+
+    def test_match_expression_drops_operators(self):
+        self.assertEqual(
+            match_expression('кот NOT "пёс" OR*'),
+            '"кот" "NOT" "пёс" "OR"',
+        )
+        self.assertEqual(match_expression('"*()'), '')
+
+    def test_ranked_results(self):
+        weak = Post.objects.create(
+            author=self.author,
+            text='Сегодня был дождь, а про котов ни слова. Кот.')
+        strong = Post.objects.create(
+            author=self.author, text='Кот, кот и ещё раз кот')
+        Post.objects.create(author=self.author, text='Про собак')
+        self.assertEqual(self.search('кот'), [strong, weak])
+
+    def test_all_words_required(self):
+        both = Post.objects.create(author=self.author, text='Рыжий кот')
+        Post.objects.create(author=self.author, text='Рыжий пёс')
+        self.assertEqual(self.search('кот рыжий'), [both])
+
+    def test_index_follows_edit_and_delete(self):
+        post = Post.objects.create(author=self.author, text='Старый текст')
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(self.search('старый'), [])
+        self.assertEqual(self.search('новый'), [post])
+        post.delete()
+        self.assertEqual(self.search('новый'), [])
+
+    def test_rebuild_command_repairs_index(self):
+        post = Post.objects.create(author=self.author, text='Потерянный')
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        self.assertEqual(self.search('потерянный'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('потерянный'), [post])
+
+    def test_search_view(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Кот номер {number}')
+            for number in range(POST_PER_PAGE + 3)
+        )
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = self.client.get(reverse('posts:search'), {'q': 'кот'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, POST_PER_PAGE + 3)
+        self.assertEqual(len(page_obj), POST_PER_PAGE)
+        self.assertContains(response, '?page=2&amp;q=%D0%BA%D0%BE%D1%82')
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'кот', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_search_view_without_query(self):
+        response = self.client.get(reverse('posts:search'), {'q': '  '})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['page_obj'])
+
+    def test_admin_search(self):
+        post = Post.objects.create(author=self.author, text='Админский кот')
+        Post.objects.create(author=self.author, text='Админский пёс')
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кот'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
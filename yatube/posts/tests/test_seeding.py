@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import LiveServerTestCase, TestCase
+
+from posts.benchmark import compare, run, url_names
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+from posts.seeding import seed
+
+User = get_user_model()
+
+
+class SeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed(users=30, groups=3, posts=300, comments=200, follows=60)
+
+    def test_counts(self):
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def test_activity_is_skewed(self):
+        counts = sorted(
+            User.objects.annotate(total=Count('posts'))
+            .values_list('total', flat=True),
+            reverse=True,
+        )
+        self.assertGreater(counts[0], 5 * counts[len(counts) // 2])
+
+    def test_counters_match(self):
+        for user in User.objects.annotate(total=Count('posts')):
+            with self.subTest(user=user.username):
+                self.assertEqual(user.stats.post_count, user.total)
+        for post in Post.objects.annotate(total=Count('comments')):
+            self.assertEqual(post.comment_count, post.total)
+
+    def test_benchmark_covers_every_url(self):
+        results = run(repeat=2)
+        self.assertEqual(
+            set(results), {f'posts:{name}' for name in url_names()})
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertGreater(result['p95_ms'], 0)
+                self.assertGreater(result['peak_kb'], 0)
+
+
+class CompareTest(TestCase):
+    def test_regressions(self):
+        before = {'100': {'posts:index': {'p95_ms': 10, 'queries': 3}}}
+        after = {'100': {
+            'posts:index': {'p95_ms': 13, 'queries': 4},
+            'posts:search': {'p95_ms': 50, 'queries': 9},
+        }}
+        self.assertEqual(len(compare(before, after, 0.2)), 2)
+        self.assertEqual(len(compare(before, after, 0.5)), 1)
+        self.assertEqual(compare(after, after, 0), [])
+
+
+class ConcurrencyBenchTest(LiveServerTestCase):
+    def test_read_views_served(self):
+        seed(users=20, groups=2, posts=50, comments=50, follows=30)
+        out = StringIO()
+        call_command(
+            'bench_concurrency', '--url', self.live_server_url,
+            '--concurrency', '1', '--requests', '3', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        for line in lines:
+            with self.subTest(line=line):
+                self.assertTrue(line.endswith('ошибок 0'))
@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Job
+from posts.models import Post
+from posts.thumbnails import cached_thumbnail, thumbnails_key
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def create_post(self):
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Post-with-image',
+            'image': SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'),
+        })
+        return Post.objects.get(text='Post-with-image')
+
+    def test_post_create_schedules_job_and_shows_placeholder(self):
+        post = self.create_post()
+        self.assertTrue(Job.objects.filter(
+            key=thumbnails_key(post.pk), status=Job.PENDING).exists())
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotContains(response, '<img class="card-img')
+        self.assertContains(response, 'bg-light')
+
+    def test_worker_generates_thumbnails(self):
+        post = self.create_post()
+        call_command(
+            'thumbnail_worker', '--once', '--threads', '0', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        self.assertEqual(
+            Job.objects.get(key=thumbnails_key(post.pk)).status, Job.DONE)
+        self.assertIsNotNone(cached_thumbnail(post.image, 'card'))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, '<img class="card-img')
+
+    def test_job_is_not_duplicated(self):
+        post = self.create_post()
+        self.authorized_client.get(reverse('posts:index'))
+        self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertEqual(
+            Job.objects.filter(key=thumbnails_key(post.pk)).count(), 1)
+
+    def test_failed_job_is_not_repeated_by_views(self):
+        post = self.create_post()
+        Job.objects.filter(key=thumbnails_key(post.pk)).update(
+            status=Job.FAILED)
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        for _ in range(3):
+            cache.clear()
+            self.authorized_client.get(url)
+        self.assertEqual(
+            Job.objects.filter(key=thumbnails_key(post.pk)).count(), 1)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}), {
+                'text': 'Post-with-image',
+                'image': SimpleUploadedFile(
+                    'other.gif', SMALL_GIF, content_type='image/gif'),
+            })
+        self.assertTrue(Job.objects.filter(
+            key=thumbnails_key(post.pk), status=Job.PENDING).exists())
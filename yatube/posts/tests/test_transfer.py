@@ -0,0 +1,179 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import (
+    Comment, Follow, Group, GroupStats, Post, TimelineEntry, UserStats
+)
+from posts.search import search_posts
+
+User = get_user_model()
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Test-group', slug='test-slug', description='Test')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Первый пост')
+        Post.objects.create(author=self.reader, text='Второй пост')
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def export(self, name, *args):
+        call_command(
+            'export_posts', self.path(name), *args, stderr=StringIO())
+
+    def load(self, name, *args):
+        call_command(
+            'import_posts', self.path(name), *args, stdout=StringIO())
+
+    def assertRoundTrip(self, posts_file, comments_file):
+        self.export(posts_file)
+        self.export(comments_file, '--comments')
+        expected = list(Post.objects.order_by('pk').values_list(
+            'pk', 'author__username', 'group__slug', 'text', 'pub_date'))
+        Post.objects.all().delete()
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.load(posts_file, '--batch-size', '1')
+        self.load(comments_file, '--comments')
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'pk', 'author__username', 'group__slug', 'text',
+                'pub_date')),
+            expected,
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(UserStats.objects.get(user=self.author).post_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(list(search_posts('первый')[:1]), [post])
+
+    def test_ndjson_round_trip(self):
+        self.assertRoundTrip('posts.ndjson', 'comments.ndjson')
+
+    def test_csv_round_trip(self):
+        self.assertRoundTrip('posts.csv', 'comments.csv')
+
+    def test_import_invalidates_feeds(self):
+        self.client.get(reverse('posts:index'))
+        with open(self.path('new.ndjson'), 'w', encoding='utf-8') as file:
+            file.write(
+                '{"author": "newcomer", "text": "Новый пост", '
+                '"pub_date": "2100-01-01T00:00:00Z"}\n')
+        self.load('new.ndjson')
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'][0].text, 'Новый пост')
+        newcomer = User.objects.get(username='newcomer')
+        self.assertFalse(newcomer.has_usable_password())
+        self.assertEqual(newcomer.stats.post_count, 1)
+
+    def test_invalid_file_rolls_back(self):
+        with open(self.path('bad.ndjson'), 'w', encoding='utf-8') as file:
+            file.write('{"author": "author", "text": "Пост"}\n')
+            file.write('{"author": "author", "text": "Пост", '
+                       '"group": "missing"}\n')
+        with self.assertRaises(CommandError):
+            self.load('bad.ndjson')
+        self.assertEqual(Post.objects.count(), 2)
+
+    def write(self, name, *lines):
+        with open(self.path(name), 'w', encoding='utf-8') as file:
+            file.writelines(line + '\n' for line in lines)
+
+    def test_import_fans_out_only_new_posts(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        self.write(
+            'new.ndjson', '{"author": "author", "text": "Новый пост"}')
+        self.load('new.ndjson')
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('post__text', flat=True)),
+            ['Новый пост']
+        )
+
+    def test_import_fan_out_respects_backfill_limit(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        self.write('new.ndjson', *(
+            f'{{"author": "author", "text": "Пост {day}", '
+            f'"pub_date": "2100-01-0{day}T00:00:00Z"}}'
+            for day in range(1, 4)
+        ))
+        with mock.patch('posts.timeline.BACKFILL_LIMIT', 2):
+            self.load('new.ndjson')
+        self.assertEqual(
+            sorted(TimelineEntry.objects.values_list(
+                'post__text', flat=True)),
+            ['Пост 2', 'Пост 3']
+        )
+
+    def test_malformed_values_rejected(self):
+        cases = {
+            'date.ndjson': '{"author": "author", "text": "Пост", '
+                           '"pub_date": "2020-13-45T00:00:00"}',
+            'list.ndjson': '[1, 2]',
+            'group.ndjson': '{"author": "author", "text": "Пост", '
+                            '"group": 5}',
+            'number_date.ndjson': '{"author": "author", "text": "Пост", '
+                                  '"pub_date": 5}',
+            'comment.ndjson': '{"post": "first", "author": "author", '
+                              '"text": "Комментарий"}',
+        }
+        for name, line in cases.items():
+            self.write(name, line)
+            args = ('--comments',) if name.startswith('comment') else ()
+            with self.subTest(name=name):
+                with self.assertRaises(CommandError):
+                    self.load(name, *args)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_import_touches_only_new_posts(self):
+        other = Group.objects.create(title='Other', slug='other')
+        search.unindex_post(self.post.pk)
+        self.write('new.ndjson', '{"author": "author", "text": "Новый пост", '
+                   '"group": "test-slug"}')
+        self.load('new.ndjson')
+        self.assertEqual(search_posts('первый').count(), 0)
+        self.assertEqual(search_posts('новый').count(), 1)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 2)
+        self.assertFalse(GroupStats.objects.filter(group=other).exists())
+
+    def test_explicit_ids_below_existing_posts(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        old_pk = self.post.pk
+        self.post.delete()
+        self.write('old.ndjson', f'{{"id": {old_pk}, "author": "author", '
+                   f'"text": "Возвращённый пост"}}')
+        self.load('old.ndjson')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post_id=old_pk).exists())
+        self.assertEqual(search_posts('возвращённый')[0].pk, old_pk)
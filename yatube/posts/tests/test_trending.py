@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Job
+from posts.models import Comment, Post
+from posts.trending import HORIZON, VELOCITY_WINDOW, hot_score, recompute
+from posts.utils import POST_PER_PAGE
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+
+    def create_post(self, text, age=timedelta(0), comments=0):
+        post = Post.objects.create(author=self.author, text=text)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - age)
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.reader, text='Test-comment')
+            for _ in range(comments)
+        )
+        return post
+
+    def scores(self):
+        return dict(Post.objects.values_list('text', 'hot_score'))
+
+    def test_score_decays_and_grows_with_comments(self):
+        age = timedelta(hours=5)
+        self.assertGreater(hot_score(3, 0, age), hot_score(1, 0, age))
+        self.assertGreater(
+            hot_score(1, 0, age), hot_score(1, 0, age * 2))
+        self.assertGreater(hot_score(1, 100, age), hot_score(1, 0, age))
+
+    def test_recompute_orders_posts(self):
+        self.create_post('Fresh')
+        self.create_post('Discussed', timedelta(hours=3), comments=5)
+        self.create_post('Old', timedelta(hours=30))
+        self.assertEqual(recompute(), 3)
+        scores = self.scores()
+        self.assertGreater(scores['Discussed'], scores['Fresh'])
+        self.assertGreater(scores['Fresh'], scores['Old'])
+
+    def test_inactive_posts_fade(self):
+        post = self.create_post('Stale', HORIZON + timedelta(days=1))
+        Post.objects.filter(pk=post.pk).update(hot_score=1)
+        self.create_post('Revived', HORIZON * 2, comments=1)
+        self.assertEqual(recompute(), 2)
+        scores = self.scores()
+        self.assertEqual(scores['Stale'], 0)
+        self.assertGreater(scores['Revived'], 0)
+        later = timezone.now() + VELOCITY_WINDOW + timedelta(hours=1)
+        self.assertEqual(recompute(later), 1)
+        self.assertEqual(self.scores()['Revived'], 0)
+
+    def test_trending_page(self):
+        for number in range(POST_PER_PAGE):
+            self.create_post(f'Post-{number}', timedelta(hours=1))
+        self.create_post('Quiet', HORIZON * 2)
+        top = self.create_post('Top', timedelta(hours=1), comments=3)
+        recompute()
+        url = reverse('posts:trending')
+        response = self.client.get(url)
+        page = response.context['page_obj']
+        self.assertEqual(len(page), POST_PER_PAGE)
+        self.assertEqual(page[0].pk, top.pk)
+        response = self.client.get(url, {'cursor': page.next_cursor})
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertNotContains(response, 'Quiet')
+
+    def test_page_invalidated_by_recompute(self):
+        url = reverse('posts:trending')
+        self.assertNotContains(self.client.get(url), 'Test-post')
+        self.create_post('Test-post')
+        recompute()
+        self.assertContains(self.client.get(url), 'Test-post')
+
+    def test_activity_schedules_recompute(self):
+        post = Post.objects.create(author=self.author, text='Test-post')
+        Comment.objects.create(
+            post=post, author=self.reader, text='Test-comment')
+        pending = Job.objects.filter(key='trending', status=Job.PENDING)
+        self.assertEqual(pending.count(), 1)
+        pending.update(run_at=timezone.now())
+        call_command(
+            'run_workers', '--queues', 'stats', '--threads', '0', '--once',
+            stdout=StringIO())
+        self.assertGreater(Post.objects.get(pk=post.pk).hot_score, 0)
+
+    def test_command(self):
+        self.create_post('Test-post')
+        out = StringIO()
+        call_command('recompute_trending', stdout=out)
+        self.assertIn('Пересчитано постов: 1', out.getvalue())
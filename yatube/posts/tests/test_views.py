@@ -1,16 +1,19 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.core.cache import cache
-from django.test import Client, TestCase, override_settings
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from django import forms
 
 from posts.models import Group, Post, Comment
-from posts.models import Follow
+from posts.models import Follow, TimelineEntry
+from posts.feed_cache import page_key
+from posts.utils import COMMENTS_PER_PAGE, page_variant
 
 User = get_user_model()
 
@@ -117,14 +120,26 @@ class PostViewsTest(TestCase):
 
     def test_cache_index(self):
         response_1 = self.authorized_client.get(reverse('posts:index'))
-        test_post = Post.objects.get()
-        test_post.text = 'Измененный текст'
-        test_post.save()
+        Post.objects.filter(pk=self.post.pk).update(text='Измененный текст')
         response_2 = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(response_1.content, response_2.content)
-        cache.clear()
+        test_post = Post.objects.get()
+        test_post.save()
         response_3 = self.authorized_client.get(reverse('posts:index'))
         self.assertNotEqual(response_1.content, response_3.content)
+        self.assertContains(response_3, 'Измененный текст')
+
+    def test_cache_index_serves_stale_page_during_rebuild(self):
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        Post.objects.create(author=self.user, text='Новый пост')
+        lock = page_key('index', page_variant(RequestFactory().get(url)))
+        cache.add(f'{lock}:lock', True)
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, 'Новый пост')
+        cache.delete(f'{lock}:lock')
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Новый пост')
 
     def test_group_list_context(self):
         response = self.authorized_client.get(
@@ -281,6 +296,42 @@ class FollowingTest(TestCase):
         response = self.nonfollower_client.get('/follow/')
         self.assertNotContains(response, 'Test-post')
 
+    def test_new_post_fanned_out_to_followers(self):
+        post = Post.objects.create(author=self.user, text='Fan-out-post')
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.follower, post=post).exists()
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(
+                user=self.nonfollower, post=post).exists()
+        )
+
+    def test_follow_backfills_and_unfollow_prunes_timeline(self):
+        self.nonfollower_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.user}))
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.nonfollower, post=self.post).exists()
+        )
+        self.nonfollower_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.user}))
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.nonfollower).exists()
+        )
+
+    @mock.patch('posts.timeline.FANOUT_LIMIT', 0)
+    def test_popular_author_posts_read_on_request(self):
+        post = Post.objects.create(author=self.user, text='Popular-post')
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=post).exists()
+        )
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'])
+        self.assertIn(self.post, response.context['page_obj'])
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
@@ -332,6 +383,64 @@ class PaginatorViewsTest(TestCase):
                 response = self.authorized_client.get(reverse_name + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_cursor_pages(self):
+        reverse_list = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'HasNoName'}),
+        ]
+        for reverse_name in reverse_list:
+            with self.subTest(reverse_name=reverse_name):
+                cache.clear()
+                first_page = self.authorized_client.get(
+                    reverse_name).context['page_obj']
+                cache.clear()
+                second_page = self.authorized_client.get(
+                    reverse_name, {'cursor': first_page.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(len(second_page), 3)
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(
+                    second_page[0].text,
+                    f'Test-text {TESTS_POSTS_NUM - 11}'
+                )
+                cache.clear()
+                previous_page = self.authorized_client.get(
+                    reverse_name, {'cursor': second_page.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    [post.id for post in previous_page],
+                    [post.id for post in first_page]
+                )
+                self.assertFalse(previous_page.has_previous())
+
+    def test_follow_index_pages(self):
+        follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=follower, author=self.user)
+        client = Client()
+        client.force_login(follower)
+        url = reverse('posts:follow_index')
+        first_page = client.get(url).context['page_obj']
+        self.assertEqual(
+            [post.id for post in first_page],
+            [post.id for post in reversed(self.post)][:10]
+        )
+        second_page = client.get(
+            url, {'cursor': first_page.next_cursor}).context['page_obj']
+        self.assertEqual(
+            [post.id for post in second_page],
+            [post.id for post in reversed(self.post)][10:]
+        )
+        previous_page = client.get(
+            url, {'cursor': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(previous_page), list(first_page))
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': 'broken'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+
     def test_new_post(self):
         post_0 = Post.objects.create(
             author=User.objects.create_user(username='Test-User'),
@@ -352,3 +461,303 @@ class PaginatorViewsTest(TestCase):
                 for post in posts:
                     posts_ids.append(post.id)
                 self.assertIn(post_0.id, posts_ids)
+
+
+class FeedQueriesTest(TestCase):
+    # Группе и профилю нужен ещё один запрос на ETag (см. posts.etags),
+    # ленте подписок — на посты страницы по id из строк ленты.
+    FEED_QUERIES = {
+        'posts:index': 4,
+        'posts:group_list': 6,
+        'posts:profile': 7,
+        'posts:follow_index': 6,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Test-group',
+            slug='test-slug',
+            description='Test-description',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                author=self.author,
+                text=f'Test-text {i}',
+                group=self.group,
+            )
+            Comment.objects.create(
+                text='Test-comment',
+                author=self.user,
+                post=post,
+            )
+
+    def feed_urls(self):
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+
+    def test_feed_queries_do_not_depend_on_posts_count(self):
+        for posts_count in (1, TESTS_POSTS_NUM):
+            Post.objects.all().delete()
+            self.create_posts(posts_count)
+            for name, url in self.feed_urls().items():
+                with self.subTest(name=name, posts_count=posts_count):
+                    cache.clear()
+                    with self.assertNumQueries(self.FEED_QUERIES[name]):
+                        response = self.authorized_client.get(url)
+                    self.assertEqual(
+                        response.context['page_obj'][0].comment_count, 1
+                    )
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Test-group',
+            slug='test-slug',
+            description='Test-description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Test-post',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        cache.clear()
+
+    def test_cards_rendered_once(self):
+        self.guest_client.get(self.url)
+        with mock.patch(
+            'posts.templatetags.post_cards.render_to_string'
+        ) as render_card:
+            response = self.guest_client.get(self.url)
+        render_card.assert_not_called()
+        self.assertContains(response, 'Test-post')
+
+    def test_card_changes_with_post_and_author(self):
+        self.guest_client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Changed-post')
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Changed-post')
+        User.objects.filter(pk=self.user.pk).update(first_name='Renamed')
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Renamed')
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Test-group',
+            slug='test-slug',
+            description='Test-description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Test-post',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def urls(self):
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}),
+        }
+
+    def assertNotModified(self, url, etag, client=None):
+        client = client or self.guest_client
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.templates)
+
+    def assertModified(self, url, etag, client=None):
+        client = client or self.guest_client
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def etags(self, client=None):
+        client = client or self.guest_client
+        return {
+            name: client.get(url)['ETag']
+            for name, url in self.urls().items()
+        }
+
+    def test_repeat_visit_is_not_modified(self):
+        etags = self.etags()
+        for name, url in self.urls().items():
+            with self.subTest(name=name):
+                self.assertNotModified(url, etags[name])
+
+    def test_post_edit_changes_etags(self):
+        etags = self.etags()
+        self.post.text = 'Edited'
+        self.post.save()
+        for name, url in self.urls().items():
+            with self.subTest(name=name):
+                self.assertModified(url, etags[name])
+
+    def test_author_and_group_changes_feed_pages(self):
+        urls = self.urls()
+        del urls['posts:group_list']
+        etags = self.etags()
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Renamed'
+        author.save()
+        for name, url in urls.items():
+            with self.subTest(name=name):
+                self.assertModified(url, etags[name])
+                self.assertContains(self.guest_client.get(url), 'Renamed')
+        etags = self.etags()
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        link = reverse('posts:group_list', kwargs={'slug': 'new-slug'})
+        for name, url in urls.items():
+            with self.subTest(name=name):
+                self.assertModified(url, etags[name])
+                self.assertContains(self.guest_client.get(url), link)
+
+    def test_stale_page_keeps_its_etag(self):
+        url = self.urls()['posts:index']
+        etag = self.guest_client.get(url)['ETag']
+        Post.objects.create(author=self.author, text='New-post')
+        lock = page_key('index', page_variant(RequestFactory().get(url)))
+        cache.add(f'{lock}:lock', True)
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, 'New-post')
+        self.assertEqual(response['ETag'], etag)
+        cache.delete(f'{lock}:lock')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'New-post')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertNotModified(url, response['ETag'])
+
+    def test_comment_changes_post_etag(self):
+        url = self.urls()['posts:post_detail']
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Test-comment')
+        self.assertModified(url, etag)
+
+    def test_follow_changes_profile_etag(self):
+        url = self.urls()['posts:profile']
+        etag = self.authorized_client.get(url)['ETag']
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertModified(url, etag, self.authorized_client)
+
+    def test_etag_depends_on_user(self):
+        guest = self.etags()
+        authorized = self.etags(self.authorized_client)
+        for name, url in self.urls().items():
+            with self.subTest(name=name):
+                self.assertNotEqual(guest[name], authorized[name])
+                self.assertModified(url, guest[name], self.authorized_client)
+
+    def test_missing_objects_still_404(self):
+        for url in (
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 0}),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH='*')
+                self.assertEqual(response.status_code, 404)
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Test-post')
+        users = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(5)
+        ]
+        for number in range(COMMENTS_PER_PAGE + 5):
+            Comment.objects.create(
+                post=cls.post,
+                author=users[number % len(users)],
+                text=f'Test-comment-{number}',
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_newest_comments_inline(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(
+            comments[0].text, f'Test-comment-{COMMENTS_PER_PAGE + 4}')
+        self.assertTrue(comments.has_next())
+        self.assertContains(
+            response,
+            reverse('posts:comments', kwargs={'post_id': self.post.id})
+            + f'?cursor={comments.next_cursor}'
+        )
+
+    def test_load_more(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        cursor = response.context['comments'].next_cursor
+        response = self.client.get(
+            reverse('posts:comments', kwargs={'post_id': self.post.id}),
+            {'cursor': cursor}
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments],
+            [f'Test-comment-{number}' for number in range(4, -1, -1)]
+        )
+        self.assertFalse(comments.has_next())
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_authors_loaded_with_comments(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+    def test_missing_post(self):
+        response = self.client.get(
+            reverse('posts:comments', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,99 @@
+"""Фоновая подготовка миниатюр sorl-thumbnail.
+
+Шаблоны не генерируют миниатюры в потоке запроса: тег post_thumbnail
+только смотрит в KV-хранилище sorl, а пока миниатюры нет, выводит
+заглушку и ставит задачу make_thumbnails в очередь ``thumbnails``
+(core.jobs, ``manage.py run_workers``). Перед миниатюрами задача
+пересжимает саму картинку (posts.images).
+"""
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from django.db import DEFAULT_DB_ALIAS
+
+from core.jobs import enqueue, job
+from core.models import Job
+
+from . import images
+from .feed_cache import invalidate_author_feeds
+from .models import Post
+
+# Все размеры, которые выводят шаблоны: имя -> (геометрия, опции).
+THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+    'card_480': ('480x170', {'crop': 'center', 'upscale': True}),
+    'card_1440': ('1440x509', {'crop': 'center', 'upscale': True}),
+}
+# Варианты для srcset карточки: ширина -> размер.
+CARD_SRCSET = {480: 'card_480', 960: 'card', 1440: 'card_1440'}
+
+
+class LookupBackend(ThumbnailBackend):
+    def get_cached(self, file_, geometry_string, **options):
+        """Готовая миниатюра из KV-хранилища или None, без генерации."""
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+lookup_backend = LookupBackend()
+
+
+def cached_thumbnail(image, size):
+    geometry, options = THUMBNAIL_SIZES[size]
+    return lookup_backend.get_cached(image, geometry, **options)
+
+
+def schedule(post):
+    """Ставит пост в очередь, если его задача ещё не ждёт там."""
+    if not post.image:
+        return None
+    return enqueue(
+        make_thumbnails, {'post_id': post.pk}, key=thumbnails_key(post.pk))
+
+
+def schedule_missing(post):
+    """schedule() для тега post_thumbnail, который зовут на каждом показе.
+
+    Картинку, задача которой уже исчерпала попытки, снова не ставим:
+    иначе каждый просмотр битого файла добавлял бы упавшую задачу.
+    Повторить можно заменой картинки — post_edit вызывает schedule().
+    """
+    if not post.image:
+        return None
+    known = Job.objects.using(DEFAULT_DB_ALIAS).filter(
+        key=thumbnails_key(post.pk), status__in=(Job.PENDING, Job.FAILED))
+    if known.exists():
+        return None
+    return schedule(post)
+
+
+def thumbnails_key(post_id):
+    return f'thumbnails:{post_id}'
+
+
+def generate(post):
+    images.normalize(post)
+    for geometry, options in THUMBNAIL_SIZES.values():
+        get_thumbnail(post.image, geometry, **options)
+
+
+@job(queue='thumbnails', max_attempts=3)
+def make_thumbnails(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    generate(post)
+    Post.objects.filter(pk=post_id).update(thumbnails_ready=True)
+    invalidate_author_feeds(post.author_id)
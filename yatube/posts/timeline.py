@@ -0,0 +1,150 @@
+"""Лента подписок с раздачей постов при записи (fan-out on write).
+
+Новый пост сразу раскладывается в TimelineEntry всех подписчиков автора,
+поэтому follow_index читает один индексированный диапазон вместо
+соединения Follow и Post: страница выбирается по строкам ленты в порядке
+TIMELINE_ORDERING, а сами посты догружаются по id. Посты популярных
+авторов (больше FANOUT_LIMIT подписчиков) не раздаются, а подмешиваются
+при чтении.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery
+
+from .models import Follow, Post, TimelineEntry, UserStats
+from .utils import paginator_utils
+
+FANOUT_LIMIT = 1000
+BACKFILL_LIMIT = 1000
+POPULAR_CACHE_TIMEOUT = 300
+# Совпадает с индексом timeline_user_pub_date_idx.
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+
+
+def popular_cache_key(user_id):
+    return f'timeline:popular:{user_id}'
+
+
+def is_popular(author_id):
+    return UserStats.objects.filter(
+        user_id=author_id, follower_count__gt=FANOUT_LIMIT
+    ).exists()
+
+
+def popular_authors(user_id):
+    def compute():
+        return list(
+            Follow.objects
+            .filter(
+                user_id=user_id,
+                author__stats__follower_count__gt=FANOUT_LIMIT
+            )
+            .values_list('author', flat=True)
+        )
+    return cache.get_or_set(
+        popular_cache_key(user_id), compute, POPULAR_CACHE_TIMEOUT
+    )
+
+
+def fan_out(post):
+    if is_popular(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers.iterator()
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_many(posts):
+    """Раздача многих постов сразу — после записи в обход сигналов.
+
+    Строки ленты собирает сама база одним INSERT ... SELECT, не
+    перекладывая их через Python.
+    """
+    rows = (
+        Follow.objects
+        .filter(author__posts__in=posts.values('pk'))
+        .exclude(author__stats__follower_count__gt=FANOUT_LIMIT)
+        .order_by()
+        .values_list('user_id', 'author__posts__pk', 'author__posts__pub_date')
+    )
+    select, params = rows.query.sql_with_params()
+    ops = connection.ops
+    meta = TimelineEntry._meta
+    columns = ', '.join(
+        ops.quote_name(meta.get_field(name).column)
+        for name in ('user', 'post', 'pub_date')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{ops.quote_name(meta.db_table)} ({columns}) {select} '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            params,
+        )
+
+
+def within_backfill(posts):
+    """Только посты из BACKFILL_LIMIT последних у своего автора.
+
+    Столько же получает ``backfill`` при подписке — импорт старых постов
+    не должен раздувать ленты сверх этого.
+    """
+    cutoff = Post.objects.filter(author=OuterRef('author')).order_by(
+        '-pub_date').values('pub_date')[BACKFILL_LIMIT - 1:BACKFILL_LIMIT]
+    return posts.annotate(backfill_cutoff=Subquery(cutoff)).filter(
+        Q(backfill_cutoff__isnull=True)
+        | Q(pub_date__gte=F('backfill_cutoff'))
+    )
+
+
+def backfill(user_id, author_id):
+    cache.delete(popular_cache_key(user_id))
+    if is_popular(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('pk', 'pub_date')[:BACKFILL_LIMIT]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    cache.delete(popular_cache_key(user_id))
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def timeline_posts(user):
+    popular = popular_authors(user.pk)
+    if not popular:
+        return Post.objects.feed().filter(timeline_entries__user=user)
+    return Post.objects.feed().filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+        | Q(author__in=popular)
+    )
+
+
+def timeline_page(user, request):
+    """Страница ленты подписок для follow_index."""
+    if popular_authors(user.pk):
+        return paginator_utils(timeline_posts(user), request)
+    entries = TimelineEntry.objects.filter(user=user).values(
+        'pub_date', 'post_id')
+    page_obj = paginator_utils(entries, request, TIMELINE_ORDERING)
+    ids = [entry['post_id'] for entry in page_obj.object_list]
+    posts = Post.objects.feed().in_bulk(ids)
+    page_obj.object_list = [posts[pk] for pk in ids if pk in posts]
+    return page_obj
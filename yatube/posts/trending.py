@@ -0,0 +1,79 @@
+"""Рейтинг популярных постов для /trending/.
+
+Рейтинг хранится в индексированной колонке Post.hot_score:
+
+    (1 + комментарии за сутки + REACH_WEIGHT * ln(1 + подписчики автора))
+    / (возраст в часах + 2) ** GRAVITY
+
+Пересчёт трогает только посты с недавней активностью: опубликованные за
+HORIZON или прокомментированные за VELOCITY_WINDOW; у остальных рейтинг
+обнуляется. Его запускают ``manage.py recompute_trending`` по расписанию
+(рейтинг убывает со временем и без новых событий) и задача очереди
+``stats``, которую ставят новые посты и комментарии.
+"""
+import math
+from datetime import timedelta
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from core.jobs import enqueue, job
+
+from .feed_cache import invalidate
+from .models import Comment, Post
+
+HORIZON = timedelta(days=3)
+VELOCITY_WINDOW = timedelta(hours=24)
+GRAVITY = 1.5
+REACH_WEIGHT = 0.5
+BATCH_SIZE = 500
+# Задача пересчёта после активности — не чаще раза в минуту.
+RECOMPUTE_DELAY = 60
+
+
+def hot_score(comments, followers, age):
+    hours = max(age.total_seconds(), 0) / 3600
+    return (
+        (1 + comments + REACH_WEIGHT * math.log1p(followers))
+        / (hours + 2) ** GRAVITY
+    )
+
+
+def candidates(now):
+    commented = Comment.objects.filter(
+        created__gte=now - VELOCITY_WINDOW).values('post')
+    return Post.objects.filter(
+        Q(pub_date__gte=now - HORIZON) | Q(pk__in=commented))
+
+
+def recompute(now=None):
+    """Пересчитывает рейтинг; возвращает число затронутых постов."""
+    now = now or timezone.now()
+    active = candidates(now)
+    rows = active.order_by().annotate(
+        velocity=Count(
+            'comments',
+            filter=Q(comments__created__gte=now - VELOCITY_WINDOW)
+        ),
+        followers=F('author__stats__follower_count'),
+    ).values_list('pk', 'pub_date', 'velocity', 'followers')
+    scored = [
+        Post(pk=pk, hot_score=hot_score(velocity, followers or 0,
+                                        now - pub_date))
+        for pk, pub_date, velocity, followers in rows.iterator()
+    ]
+    Post.objects.bulk_update(scored, ['hot_score'], batch_size=BATCH_SIZE)
+    faded = Post.objects.filter(hot_score__gt=0).exclude(
+        pk__in=active.values('pk')).update(hot_score=0)
+    invalidate('trending')
+    return len(scored) + faded
+
+
+@job(queue='stats')
+def recompute_trending():
+    recompute()
+
+
+def schedule_recompute():
+    return enqueue(
+        recompute_trending, key='trending', delay=RECOMPUTE_DELAY)
@@ -1,11 +1,208 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import collections.abc
+import json
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
 
 
 POST_PER_PAGE = 10
 
+# Порядок лент: (pub_date, id) однозначно задаёт позицию поста.
+FEED_ORDERING = ('-pub_date', '-id')
+
+# Популярное: рейтинг, при равенстве — новее.
+TRENDING_ORDERING = ('-hot_score', '-id')
+
+# Каталог групп — по названию.
+GROUP_ORDERING = ('title', 'id')
+
+# Комментарии под постом: сначала новые, дальше — по курсору.
+COMMENTS_PER_PAGE = 20
+COMMENT_ORDERING = ('-created', '-id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values, backwards=False):
+    payload = json.dumps([int(backwards), values], default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def cursor_key(obj, ordering):
+    """Значения ключа сортировки; obj — модель или строка из values()."""
+    if isinstance(obj, dict):
+        return [obj[name.lstrip('-')] for name in ordering]
+    return [getattr(obj, name.lstrip('-')) for name in ordering]
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        backwards, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error) as error:
+        raise InvalidCursor(token) from error
+    if not isinstance(values, list):
+        raise InvalidCursor(token)
+    return bool(backwards), values
+
+
+class CursorPaginator:
+    """Keyset-пагинация: без COUNT(*) и без OFFSET.
+
+    Страница выбирается условием на ключ сортировки последнего
+    показанного объекта, поэтому глубина страницы не влияет на стоимость
+    запроса.
+    """
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+
+    def _key(self, obj):
+        return cursor_key(obj, self.ordering)
+
+    def _to_python(self, values):
+        model = self.object_list.model
+        if len(values) != len(self.fields):
+            raise InvalidCursor(values)
+        try:
+            return [
+                model._meta.get_field(
+                    'id' if name == 'pk' else name
+                ).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except Exception as error:
+            raise InvalidCursor(values) from error
+
+    def _seek(self, values, backwards):
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            field = name.lstrip('-')
+            descending = name.startswith('-')
+            lookup = 'gt' if descending == backwards else 'lt'
+            step = Q(**{f'{field}__{lookup}': values[position]})
+            for previous, value in zip(self.fields[:position], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
 
-def paginator_utils(queryset, request):
+    def page(self, cursor=None):
+        backwards, values = False, None
+        if cursor:
+            backwards, values = decode_cursor(cursor)
+            values = self._to_python(values)
+        queryset = self.object_list
+        ordering = self.ordering
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        if backwards:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in ordering
+            ]
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(self._key(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(self._key(rows[0]), True)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        """Как Paginator.get_page: при битом курсоре — первая страница."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+class CursorPage(collections.abc.Sequence):
+    number = None
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginator_utils(queryset, request, ordering=FEED_ORDERING):
+    queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('cursor')
+    if cursor is not None:
+        paginator = CursorPaginator(queryset, POST_PER_PAGE, ordering)
+        return paginator.get_page(cursor)
     paginator = Paginator(queryset, POST_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    # Ссылка «Следующая» ведёт в keyset-режим, минуя OFFSET.
+    page_obj.next_cursor = None
+    if page_obj.has_next():
+        last = page_obj[len(page_obj) - 1]
+        page_obj.next_cursor = encode_cursor(cursor_key(last, ordering))
     return page_obj
+
+
+def comment_page(post, cursor=None):
+    """Страница комментариев поста; авторы — тем же запросом."""
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_PER_PAGE,
+        COMMENT_ORDERING,
+    )
+    return paginator.get_page(cursor)
+
+
+def freeze_page(page_obj):
+    """Копия страницы без ссылок на QuerySet, пригодная для кэша."""
+    if page_obj.number is None:
+        return CursorPage(
+            list(page_obj.object_list),
+            None,
+            page_obj.next_cursor,
+            page_obj.previous_cursor,
+        )
+    paginator = Paginator([], page_obj.paginator.per_page)
+    paginator.count = page_obj.paginator.count
+    frozen = Page(list(page_obj.object_list), page_obj.number, paginator)
+    frozen.next_cursor = page_obj.next_cursor
+    return frozen
+
+
+def page_variant(request):
+    cursor = request.GET.get('cursor')
+    if cursor is not None:
+        return f'cursor:{cursor}'
+    return f'page:{request.GET.get("page")}'
@@ -1,31 +1,78 @@
+from urllib.parse import urlencode
+
+from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
-from django.core.paginator import Paginator
-
+from django.views.decorators.http import condition
+
+from .etags import (
+    group_etag, groups_etag, index_etag, post_etag, profile_etag,
+    trending_etag
+)
+from .feed_cache import cached_page, set_served_etag
+from . import thumbnails
+from .search import search_posts
 from .forms import PostForm, CommentForm
 
 from .models import Post, Group, Follow
 
-from .utils import paginator_utils
+from .timeline import timeline_page
+from .utils import (
+    GROUP_ORDERING, POST_PER_PAGE, TRENDING_ORDERING, comment_page,
+    freeze_page, page_variant, paginator_utils
+)
 
-PAGINATOR_PAGE = 10
 
-
-@cache_page(20, key_prefix='index_page')
+@condition(etag_func=index_etag)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginator_utils(post_list, request)
+    page_obj, generation = cached_page(
+        'index',
+        page_variant(request),
+        lambda: freeze_page(paginator_utils(Post.objects.feed(), request))
+    )
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    response = render(request, 'posts/index.html', context)
+    return set_served_etag(response, request, generation)
+
+
+@condition(etag_func=trending_etag)
+def trending(request):
+    """Популярные посты по рейтингу posts.trending."""
+    page_obj, generation = cached_page(
+        'trending',
+        page_variant(request),
+        lambda: freeze_page(paginator_utils(
+            Post.objects.feed().filter(hot_score__gt=0),
+            request,
+            TRENDING_ORDERING,
+        ))
+    )
+    response = render(
+        request, 'posts/trending.html', {'page_obj': page_obj})
+    return set_served_etag(response, request, generation)
+
+
+@condition(etag_func=groups_etag)
+def groups(request):
+    """Каталог групп по готовой сводке GroupStats."""
+    page_obj, generation = cached_page(
+        'groups',
+        page_variant(request),
+        lambda: freeze_page(paginator_utils(
+            Group.objects.select_related('stats'), request, GROUP_ORDERING))
+    )
+    response = render(request, 'posts/groups.html', {'page_obj': page_obj})
+    return set_served_etag(response, request, generation)
 
 
+@condition(etag_func=group_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.feed()
     page_obj = paginator_utils(post_list, request)
     context = {
         'group': group,
@@ -34,10 +81,17 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paje_obj = paginator_utils(post_list, request)
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    paje_obj, generation = cached_page(
+        f'profile:{author.pk}',
+        page_variant(request),
+        lambda: freeze_page(paginator_utils(author.posts.feed(), request))
+    )
     following = (
         request.user.is_authenticated
         and Follow.objects.filter(user=request.user, author=author).exists()
@@ -47,22 +101,52 @@ def profile(request, username):
         'page_obj': paje_obj,
         'following': following,
     }
-    return render(request, 'posts/profile.html', context)
+    response = render(request, 'posts/profile.html', context)
+    return set_served_etag(response, request, generation)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        paginator = Paginator(search_posts(query), POST_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@condition(etag_func=post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        pk=post_id
+    )
     form = CommentForm()
-    comment = post.comments.all()
     context = {
         'post': post,
-        'comments': comment,
+        'comments': comment_page(post),
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@condition(etag_func=post_etag)
+def comments(request, post_id):
+    """Следующие комментарии поста после курсора «Показать ещё»."""
+    post = get_object_or_404(Post, pk=post_id)
+    context = {
+        'post': post,
+        'comments': comment_page(post, request.GET.get('cursor')),
+    }
+    return render(request, 'posts/comments.html', context)
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     if request.method == 'POST':
         form = PostForm(
@@ -73,6 +157,7 @@ def post_create(request):
             new_post = form.save(commit=False)
             new_post.author = request.user
             new_post.save()
+            thumbnails.schedule(new_post)
             return redirect('posts:profile', request.user)
         return render(request, 'posts/create_post.html', {'form': form})
     form = PostForm(
@@ -85,7 +170,7 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    if request.user != post.author:
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(
         request.POST or None,
@@ -98,12 +183,18 @@ def post_edit(request, post_id):
         'is_edit': True,
     }
     if form.is_valid():
+        image_changed = 'image' in form.changed_data
+        if image_changed:
+            post.thumbnails_ready = False
         form.save()
+        if image_changed:
+            thumbnails.schedule(post)
         return redirect('posts:post_detail', post_id=post_id)
     return render(request, 'posts/create_post.html', context)
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -117,30 +208,24 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, PAGINATOR_PAGE)
-    page_obj = paginator_utils(posts, request)
+    page_obj = timeline_page(request.user, request)
     context = {
         'page_obj': page_obj,
-        'paginator': paginator,
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if (
-        Follow.objects.filter(
-            author=author, user=request.user).exists()
-            or request.user == author
-    ):
-        return redirect('posts:profile', username=username)
-    Follow.objects.create(author=author, user=request.user)
+    if request.user != author:
+        Follow.objects.get_or_create(author=author, user=request.user)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(
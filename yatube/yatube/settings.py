@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -50,7 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -65,7 +68,8 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени рендеринга для core.metrics.
+        'BACKEND': 'core.backends.templates.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,11 +90,64 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# По умолчанию SQLite; YATUBE_DB_ENGINE=postgresql переключает на
+# PostgreSQL (нужен psycopg2), параметры подключения — YATUBE_DB_*.
+# Подключения живут YATUBE_DB_CONN_MAX_AGE секунд, а не один запрос.
+DB_ENGINE = os.getenv('YATUBE_DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.getenv('YATUBE_DB_CONN_MAX_AGE', 60))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('YATUBE_DB_NAME', 'yatube'),
+            'USER': os.getenv('YATUBE_DB_USER', 'yatube'),
+            'PASSWORD': os.getenv('YATUBE_DB_PASSWORD', ''),
+            'HOST': os.getenv('YATUBE_DB_HOST', 'localhost'),
+            'PORT': os.getenv('YATUBE_DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            # BEGIN IMMEDIATE вместо BEGIN, см. core/backends/sqlite3.
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': os.getenv(
+                'YATUBE_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        }
     }
+
+# Реплики для чтения: YATUBE_DB_REPLICAS — через запятую файлы SQLite
+# или хосты PostgreSQL. Запись всегда идёт в default, чтение — на
+# случайную реплику (core.routers). После POST клиент ещё
+# REPLICA_PIN_SECONDS читает из default, чтобы видеть свои записи.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv('YATUBE_DB_REPLICAS', '').split(','))
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == 'postgresql' else 'NAME': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_PIN_COOKIE = 'primary_reads'
+REPLICA_PIN_SECONDS = int(os.getenv('YATUBE_DB_REPLICA_LAG', 10))
+
+# Выполняются при каждом подключении к SQLite (core.db.configure_sqlite).
+# WAL пускает читателей параллельно с писателем, busy_timeout заставляет
+# писателей ждать очереди, а не падать с «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,  # в КиБ, около 20 МБ
+    'mmap_size': 128 * 1024 * 1024,
 }
 
 
@@ -140,11 +197,96 @@ LOGIN_REDIRECT_URL = 'posts:index'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = os.getenv('YATUBE_FROM_EMAIL', 'noreply@yatube.ru')
+# Адрес сайта для ссылок в письмах (posts.digests).
+SITE_URL = os.getenv('YATUBE_SITE_URL', 'http://localhost:8000')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Сколько последних запросов на каждое имя URL учитывают перцентили
+# /metrics (core.metrics).
+METRICS_WINDOW = 1000
+
+# Разбор SQL каждого запроса (core.queries): повторы по отпечатку,
+# запросы дольше SLOW_QUERY_MS и бюджеты по имени URL. Для разработки и
+# CI: YATUBE_QUERY_INSPECTION=1, а YATUBE_QUERY_BUDGET_STRICT=1 превращает
+# превышение бюджета в ошибку.
+QUERY_INSPECTION = os.getenv('YATUBE_QUERY_INSPECTION') == '1'
+QUERY_BUDGET_STRICT = os.getenv('YATUBE_QUERY_BUDGET_STRICT') == '1'
+SLOW_QUERY_MS = int(os.getenv('YATUBE_SLOW_QUERY_MS', 100))
+# Запросов на страницу с холодным кэшем: замер из posts.benchmark плюс
+# небольшой запас. Страница, которой нет в списке, не проверяется.
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:search': 5,
+    'posts:trending': 4,
+    'posts:groups': 4,
+    'posts:group_list': 6,
+    'posts:profile': 6,
+    'posts:post_detail': 5,
+    'posts:comments': 5,
+    'posts:post_create': 16,
+    'posts:post_edit': 6,
+    'posts:add_comment': 10,
+    'posts:follow_index': 7,
+    'posts:profile_follow': 16,
+    'posts:profile_unfollow': 12,
+}
+
+# Строка JSON на каждый запрос (core.middleware.TimingMiddleware);
+# YATUBE_REQUEST_LOG_LEVEL=INFO включает их вывод.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('YATUBE_REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'yatube.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Общий кэш выбирается переменной окружения YATUBE_CACHE_BACKEND.
+# Для нескольких воркеров gunicorn нужен общий бэкенд (не locmem):
+# db требует `manage.py createcachetable`, redis — пакет django-redis.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        os.path.join(BASE_DIR, 'cache'),
+    ),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'yatube_cache'),
+    'memcached': (
+        'django.core.cache.backends.memcached.MemcachedCache',
+        '127.0.0.1:11211',
+    ),
+    'redis': ('django_redis.cache.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+CACHE_BACKEND, CACHE_LOCATION = CACHE_BACKENDS[
+    os.getenv('YATUBE_CACHE_BACKEND', 'locmem')
+]
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION', CACHE_LOCATION),
+    },
+    # Ленты и профили: L1 в памяти воркера перед общим кэшем default.
+    'feed': {
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'feed',
+        'OPTIONS': {
+            'SHARED': 'default',
+            'LOCAL_TIMEOUT': int(os.getenv('YATUBE_CACHE_L1_TIMEOUT', 2)),
+        },
+    },
 }